@@ -1,17 +1,23 @@
-import pdfplumber
 from sentence_transformers import SentenceTransformer
 import chromadb
 import os
-import uuid  # Import UUID module
 from pathlib import Path
 
+from ingest_manifest import IngestManifest, sha256_text, point_id
+from embedding_store import EmbeddingStore
+from pdf_extraction import load_or_extract, ExtractionError
+
 print("Starting the data insertion process...")
 
 # Initialize the sentence transformer model for embeddings
-embedder = SentenceTransformer('multi-qa-MiniLM-L6-cos-v1')
+MODEL_NAME = 'multi-qa-MiniLM-L6-cos-v1'
+embedder = SentenceTransformer(MODEL_NAME)
 
 print("Sentence transformer model initialized successfully.")
 
+# Previously computed embeddings are reused across runs and rebuilds
+embedding_store = EmbeddingStore(f"{MODEL_NAME}:torch", embedder.get_sentence_embedding_dimension())
+
 # Connect to ChromaDB (persistent storage)
 # Get the project root directory (parent of Scripts directory)
 script_dir = Path(__file__).parent
@@ -24,61 +30,88 @@ collection = client.get_or_create_collection(
     metadata={"hnsw:space": "cosine"}
 )
 
+MANIFEST_PATH = project_root / "ingest_manifest_network_security_knowledge.json"
+
 # Function to extract text from PDF and store it in ChromaDB
 def process_pdfs(directory):
     page_texts = []
     embeddings = []
     ids = []
     metadatas = []
+
+    # Manifest of what is already stored, so re-runs only embed new/changed pages
+    manifest = IngestManifest.load(MANIFEST_PATH, {"model": MODEL_NAME, "unit": "page"})
+    if collection.count() == 0:
+        manifest.reset()
     
     # List PDF files in the given directory
-    pdf_files = [f for f in os.listdir(directory) if f.lower().endswith('.pdf')]
+    pdf_files = sorted(f for f in os.listdir(directory) if f.lower().endswith('.pdf'))
+    stale_ids = manifest.orphaned_ids + manifest.deleted_files(set(pdf_files))
     
     # Process each PDF
     for pdf_file in pdf_files:
         pdf_path = os.path.join(directory, pdf_file)  # Get full path for the PDF
-        
-        # Open the PDF using pdfplumber
-        with pdfplumber.open(pdf_path) as pdf:
-            # Iterate over the pages and extract text
-            for page_num, page in enumerate(pdf.pages, start=1):
-                # Extract text from the page
-                text = page.extract_text()
-                
-                # Skip empty pages
-                if not text or text.strip() == "":
-                    continue
-                
-                page_texts.append(text)
-                
-                # Generate embedding for the text of the page
-                embedding = embedder.encode([text])[0].tolist()  # Text embedding as list
-                embeddings.append(embedding)
-                
-                # Generate a unique UUID for each page
-                point_id = str(uuid.uuid4())  # Generate a unique UUID
-                ids.append(point_id)
-                
-                # Store metadata
-                metadatas.append({
-                    "document": pdf_file,
-                    "page_number": page_num,
-                    "text": text[:500]  # Store the first 500 characters for reference
-                })
+
+        # Skip files whose size/mtime/hash match the manifest
+        if not manifest.file_changed(pdf_path):
+            continue
+
+        # Page text comes from the extracted-text corpus (pdfplumber on a miss)
+        try:
+            pages, _ = load_or_extract(pdf_path, backend="pdfplumber")
+        except ExtractionError as e:
+            # Keep the previous pages and manifest entry; the file is retried next run
+            print(f"Skipping {pdf_file}: {e}")
+            continue
+        previous = manifest.begin_file(pdf_path)
+        for page_num, text in pages:
+            page_hash = sha256_text(text)
+            if manifest.page_unchanged(previous, page_num, page_hash):
+                manifest.keep_page(pdf_file, page_num, previous)
+                continue
+            
+            page_texts.append(text)
+            
+            # Deterministic ID derived from the page content
+            pid = point_id(pdf_file, page_num, 0, page_hash)
+            ids.append(pid)
+            manifest.record_page(pdf_file, page_num, page_hash, [page_hash], [pid])
+            
+            # Store metadata
+            metadatas.append({
+                "document": pdf_file,
+                "page_number": page_num,
+                "text": text[:500]  # Store the first 500 characters for reference
+            })
+
+        stale_ids.extend(manifest.stale_ids(previous, manifest.files[pdf_file]["pages"]))
     
-    # Insert all pages into ChromaDB in batches for better performance
+    # Insert all new/changed pages into ChromaDB in one batch
     if page_texts:
-        # ChromaDB can handle batch inserts efficiently
-        collection.add(
+        # Generate embeddings for all pages in one batched call
+        embeddings = embedding_store.encode(
+            page_texts,
+            lambda texts: embedder.encode(texts, batch_size=32)
+        ).tolist()
+
+        # upsert (not add) so re-runs with the same IDs overwrite instead of failing
+        collection.upsert(
             embeddings=embeddings,
             documents=page_texts,  # Full text stored as documents
             metadatas=metadatas,
             ids=ids
         )
-        print(f"Processed {len(page_texts)} pages from {len(pdf_files)} documents")
-        print(f"Total documents in collection: {collection.count()}")
+        print(f"Processed {len(page_texts)} new or changed pages from {len(pdf_files)} documents")
     else:
-        print("No PDF files found to process.")
+        print("No new or changed pages to process.")
+
+    stale_ids = manifest.unreferenced(stale_ids)
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+        print(f"Removed {len(stale_ids)} stale pages")
+
+    manifest.save()
+    print(f"Total documents in collection: {collection.count()}")
 
 if __name__ == "__main__":
     parent_path = Path(__file__).parent.parent
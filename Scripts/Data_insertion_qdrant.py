@@ -1,20 +1,50 @@
-from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import VectorParams, Distance, PointStruct
+from qdrant_client.http.models import PointStruct, PointIdsList
 import os
+import time
 import uuid
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
+from embedding_backends import load_encoder, EMBED_BACKEND
+from chunking import chunk_text
+from pdf_extraction import extract_pdf_pages
+from ingest_manifest import IngestManifest, sha256_text, point_id
+from embedding_store import EmbeddingStore
+from qdrant_profiles import collection_kwargs, get_profile
+from topic_catalog import TOPIC_CATALOG, build_catalog
+from index_artifact import collection_present
+
+# Chunk size / overlap in encoder word pieces (MiniLM truncates at 256)
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "40"))
+
+# Pipeline sizing: extraction processes, chunks per encode call,
+# points per upsert request and concurrent upsert requests
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+ENCODE_BATCH = int(os.getenv("ENCODE_BATCH", "64"))
+UPSERT_BATCH = int(os.getenv("UPSERT_BATCH", "256"))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+
 # =============================================
 # 1. Load Embedding Model
 # =============================================
 MODEL_NAME = "all-MiniLM-L6-v2"
-print(f"Loading SentenceTransformer model: {MODEL_NAME} ...")
-embedder = SentenceTransformer(MODEL_NAME)
+print(f"Loading SentenceTransformer model: {MODEL_NAME} (backend: {EMBED_BACKEND}) ...")
+embedder = load_encoder(MODEL_NAME)
 EMBED_DIM = embedder.get_sentence_embedding_dimension()
 print(f"✔ Model loaded (Embedding dimension = {EMBED_DIM}).\n")
 
+# Previously computed embeddings are reused across runs and rebuilds
+embedding_store = EmbeddingStore(f"{MODEL_NAME}:{embedder.embed_backend}", EMBED_DIM)
+print(f"✔ Embedding cache: {len(embedding_store)} cached vectors.\n")
+
+
+def count_tokens(text):
+    return len(embedder.tokenizer.tokenize(text))
+
 # =============================================
 # 2. Connect to Qdrant
 # =============================================
@@ -23,53 +53,128 @@ qdrant_client = QdrantClient(host="localhost", port=6333)
 print("✔ Connected to Qdrant.\n")
 
 collection_name = "network_security_docs"
+MANIFEST_PATH = Path(__file__).parent.parent / f"ingest_manifest_{collection_name}.json"
+DELETE_BATCH = 1000
 
 
 # =============================================
 # Create Qdrant collection if missing
 # =============================================
 def create_collection():
+    """Returns True if the collection had to be created."""
     collections = qdrant_client.get_collections().collections
     existing = [c.name for c in collections]
 
     print(f"Existing collections: {existing}")
 
-    if collection_name not in existing:
-        print(f"➡ Creating new collection '{collection_name}' ...")
+    # A restored index artifact is exposed under the collection name as an alias
+    if not collection_present(qdrant_client, collection_name):
+        profile, _ = get_profile()
+        print(f"➡ Creating new collection '{collection_name}' (profile: {profile}) ...")
         qdrant_client.create_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(
-                size=EMBED_DIM,
-                distance=Distance.COSINE
-            )
+            **collection_kwargs(EMBED_DIM, profile)
         )
         print(f"✔ Collection '{collection_name}' created.\n")
-    else:
-        print(f"✔ Using existing collection '{collection_name}'.\n")
+        return True
+
+    print(f"✔ Using existing collection '{collection_name}'.\n")
+    return False
 
 
 # =============================================
-# Extract text from PDF using pypdf
+# Pipeline stages
 # =============================================
-def extract_text_pypdf(pdf_path):
-    try:
-        reader = PdfReader(pdf_path)
-        print(f"   → Total pages: {len(reader.pages)}")
-
-        for page_num, page in enumerate(reader.pages, start=1):
-            print(f"   → Extracting Page {page_num}/{len(reader.pages)} ...")
-
-            text = page.extract_text()
-
-            if not text or not text.strip():
-                print("     ⚠ Empty page — skipped.\n")
-                continue
-
-            yield page_num, text
-
-    except Exception as e:
-        print(f"❌ ERROR reading PDF with pypdf: {pdf_path.name} — {e}")
-        return
+class StageTimer:
+    """Accumulates busy time and item counts per pipeline stage."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.pages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, pages):
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            self.pages[stage] = self.pages.get(stage, 0) + pages
+
+    def report(self):
+        for stage, seconds in self.seconds.items():
+            rate = self.pages[stage] / seconds if seconds else 0.0
+            print(f"📌 {stage:<8} {self.pages[stage]:>6} pages in {seconds:7.2f}s busy → {rate:8.1f} pages/sec")
+
+
+def iter_extracted(pdf_files, timer, digests=None):
+    """
+    Extracts PDFs in a process pool, keeping at most 2 files per worker in flight.
+    Yields (name, pages, sha256); `digests` (name -> sha256) saves the workers re-hashing known files.
+    """
+    digests = digests or {}
+    # fork keeps workers cheap on Linux; workers only touch pdf_extraction/pypdf
+    mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    pending = set()
+    files = iter(pdf_files)
+
+    with ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=mp_context) as pool:
+        for pdf_file in files:
+            pending.add(pool.submit(extract_pdf_pages, pdf_file, "pypdf", digests.get(pdf_file.name)))
+            if len(pending) >= EXTRACT_WORKERS * 2:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, pages, seconds, from_corpus, sha256 = future.result()
+                # Unparseable PDFs are skipped: their stored pages and manifest entry stay as they were
+                if pages is not None:
+                    timer.add("corpus" if from_corpus else "extract", seconds, len(pages))
+                    yield name, pages, sha256
+                next_file = next(files, None)
+                if next_file is not None:
+                    pending.add(pool.submit(extract_pdf_pages, next_file, "pypdf", digests.get(next_file.name)))
+
+
+class Uploader:
+    """Concurrent chunked upserts; submit() blocks when too many batches are in flight."""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.pool = ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY)
+        self.pending = set()
+        self.buffer = []
+        self.buffer_pages = set()
+        self.uploaded = 0
+
+    def _upsert(self, points, pages):
+        started = time.perf_counter()
+        qdrant_client.upsert(collection_name=collection_name, points=points, wait=True)
+        self.timer.add("upsert", time.perf_counter() - started, pages)
+        return len(points)
+
+    def _drain(self, limit):
+        while len(self.pending) > limit:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.uploaded += future.result()
+
+    def add(self, points, page_key):
+        self.buffer.extend(points)
+        self.buffer_pages.add(page_key)
+        if len(self.buffer) >= UPSERT_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            # Backpressure: wait for a slot before queueing another batch
+            self._drain(UPSERT_CONCURRENCY - 1)
+            self.pending.add(self.pool.submit(self._upsert, self.buffer, len(self.buffer_pages)))
+            self.buffer = []
+            self.buffer_pages = set()
+
+    def close(self):
+        self.flush()
+        self._drain(0)
+        self.pool.shutdown()
 
 
 # =============================================
@@ -83,53 +188,138 @@ def process_pdfs(directory):
         print(f"❌ ERROR: Directory does not exist: {directory}")
         return
 
-    create_collection()
-
-    pdf_files = list(directory.glob("*.pdf"))
+    manifest = IngestManifest.load(MANIFEST_PATH, {
+        "model": MODEL_NAME,
+        "chunk_tokens": CHUNK_TOKENS,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "backend": EMBED_BACKEND
+    })
+    created = create_collection()
+    if created:
+        manifest.reset()
+    # A new collection or changed chunking settings re-cluster the topics; otherwise new chunks join the existing ones
+    full_rebuild = created or bool(manifest.orphaned_ids)
+
+    pdf_files = sorted(directory.glob("*.pdf"))
     print(f"Found {len(pdf_files)} PDF file(s): {[f.name for f in pdf_files]}\n")
 
-    total_pages = 0
-    batch_points = []
-
-    for pdf_file in pdf_files:
-        print(f"📄 Opening PDF: {pdf_file.name}")
-
-        for page_num, text in extract_text_pypdf(pdf_file):
-            total_pages += 1
-            print("     ✔ Extracted text. Generating embedding...")
+    # Only new / modified files are extracted at all
+    stale_ids = manifest.orphaned_ids + manifest.deleted_files({f.name for f in pdf_files})
+    changed_files = [f for f in pdf_files if manifest.file_changed(f)]
+    print(f"🔎 {len(changed_files)} new or modified file(s), {len(pdf_files) - len(changed_files)} unchanged.\n")
 
-            embedding = embedder.encode(text).tolist()
-            point_id = str(uuid.uuid4())
+    timer = StageTimer()
+    uploader = Uploader(timer)
+    total_pages = 0
+    skipped_pages = 0
+    total_chunks = 0
+    started = time.perf_counter()
+
+    # Chunks waiting to be encoded: (document, page_number, chunk, point_id)
+    encode_buffer = []
+
+    def encode_and_queue():
+        if not encode_buffer:
+            return
+        t0 = time.perf_counter()
+        embeddings = embedding_store.encode(
+            [c["text"] for _, _, c, _ in encode_buffer],
+            lambda texts: embedder.encode(texts, batch_size=ENCODE_BATCH)
+        )
+        timer.add("encode", time.perf_counter() - t0, len({(d, p) for d, p, _, _ in encode_buffer}))
 
-            batch_points.append(
+        for (document, page_num, chunk, pid), embedding in zip(encode_buffer, embeddings):
+            uploader.add([
                 PointStruct(
-                    id=point_id,
-                    vector=embedding,
+                    id=pid,
+                    vector=embedding.tolist(),
                     payload={
-                        "document": pdf_file.name,
+                        "document": document,
                         "page_number": page_num,
-                        "text": text,
+                        "chunk_index": chunk["chunk_index"],
+                        "char_start": chunk["char_start"],
+                        "char_end": chunk["char_end"],
+                        "text": chunk["text"],
                     }
                 )
-            )
-
-            print(f"     ✔ Added Page {page_num} to batch.\n")
-
-        print(f"Finished processing PDF: {pdf_file.name}\n")
+            ], (document, page_num))
+        encode_buffer.clear()
 
-    # =============================================
-    # Batch upload for high speed
-    # =============================================
-    if batch_points:
-        print(f"🚀 Uploading {len(batch_points)} pages in batch...")
-        qdrant_client.upsert(collection_name=collection_name, points=batch_points)
-        print("✔ Batch upload completed.\n")
+    try:
+        for document, pages, sha256 in iter_extracted(changed_files, timer, manifest.file_digests):
+            print(f"📄 Extracted {document}: {len(pages)} page(s)")
+            previous = manifest.begin_file(directory / document, sha256)
+
+            for page_num, text in pages:
+                page_hash = sha256_text(text)
+                if manifest.page_unchanged(previous, page_num, page_hash):
+                    manifest.keep_page(document, page_num, previous)
+                    skipped_pages += 1
+                    continue
+
+                total_pages += 1
+                t0 = time.perf_counter()
+                chunks = chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, count_tokens=count_tokens)
+                timer.add("chunk", time.perf_counter() - t0, 1)
+
+                chunk_hashes = [sha256_text(c["text"]) for c in chunks]
+                point_ids = [point_id(document, page_num, c["chunk_index"], h) for c, h in zip(chunks, chunk_hashes)]
+                manifest.record_page(document, page_num, page_hash, chunk_hashes, point_ids)
+
+                encode_buffer.extend(zip([document] * len(chunks), [page_num] * len(chunks), chunks, point_ids))
+                total_chunks += len(chunks)
+                if len(encode_buffer) >= ENCODE_BATCH:
+                    encode_and_queue()
+
+            stale_ids.extend(manifest.stale_ids(previous, manifest.files[document]["pages"]))
+
+        encode_and_queue()
+    finally:
+        uploader.close()
+
+    if total_chunks:
+        print(f"✔ Uploaded {uploader.uploaded} chunks.\n")
     else:
-        print("⚠ No valid pages found — nothing to upload.\n")
+        print("✔ No new or changed pages — nothing to upload.\n")
 
+    stale_ids = manifest.unreferenced(stale_ids)
+    for i in range(0, len(stale_ids), DELETE_BATCH):
+        qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=stale_ids[i:i + DELETE_BATCH]),
+            wait=True
+        )
+    if stale_ids:
+        print(f"🧹 Removed {len(stale_ids)} stale chunk(s).\n")
+
+    # Only recorded once every upsert/delete went through
+    manifest.save()
+
+    # Update the quiz topic catalog (tags points with topic_id)
+    catalog = None
+    if total_chunks or stale_ids or not TOPIC_CATALOG.exists():
+        t0 = time.perf_counter()
+        catalog = build_catalog(qdrant_client, collection_name, incremental=not full_rebuild)
+        if catalog:
+            print(f"🏷  Topic catalog: {len(catalog['topics'])} topics ({time.perf_counter() - t0:.1f}s)")
+            for topic in catalog["topics"]:
+                print(f"   [{topic['id']:>2}] {topic['label']} ({topic['size']} chunks)")
+            print()
+
+    if total_chunks or stale_ids or catalog:
+        # Signal running apps that cached answers / topics are stale
+        (Path(__file__).parent.parent / ".ingest_version").write_text(str(uuid.uuid4()))
+
+    elapsed = time.perf_counter() - started
     print("🎉 COMPLETED")
-    print(f"📌 Total pages inserted: {total_pages}")
-    print(f"📌 Total documents processed: {len(pdf_files)}\n")
+    print(f"📌 Total pages inserted: {total_pages} ({skipped_pages} unchanged pages skipped)")
+    print(f"📌 Total chunks inserted: {total_chunks}")
+    print(f"📌 Total documents processed: {len(changed_files)} of {len(pdf_files)}")
+    print(f"📌 Wall time: {elapsed:.2f}s ({total_pages / elapsed if elapsed else 0:.1f} pages/sec end-to-end)")
+    timer.report()
+    cache = embedding_store.stats()
+    print(f"📌 Embedding cache: {cache['hits']} hits, {cache['misses']} misses, {cache['entries']} stored")
+    print()
 
 
 # =============================================
@@ -1,18 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Form
 from fastapi.responses import HTMLResponse
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
-import requests
 import random
 import json
 import re
+import sys
+import asyncio
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent))
+from llm_client import LLMClient
+from topic_catalog import TopicCatalog
+from ingest_version import read_ingest_version
+
 # ============================================================
 # FASTAPI
 # ============================================================
-app = FastAPI(title="Quiz Agent (LMStudio + Qdrant + 4 Question Types)")
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await llm.aclose()
+
+
+app = FastAPI(title="Quiz Agent (LMStudio + Qdrant + 4 Question Types)", lifespan=lifespan)
 
 NUM_QUESTIONS = 5
 
@@ -36,6 +49,7 @@ def render_template(name, **kwargs):
 embedder = SentenceTransformer("multi-qa-MiniLM-L6-cos-v1")
 qdrant = QdrantClient(host="localhost", port=6333)
 COLLECTION_NAME = "network_security_docs"
+topic_catalog = TopicCatalog()
 
 # ============================================================
 # LM STUDIO CONFIG
@@ -43,6 +57,8 @@ COLLECTION_NAME = "network_security_docs"
 LMSTUDIO_URL = "http://localhost:1234/v1/chat/completions"
 LMSTUDIO_MODEL = "meta-llama-3.1-8b-instruct"
 
+llm = LLMClient(LMSTUDIO_URL, LMSTUDIO_MODEL, timeout=30)
+
 
 # ============================================================
 # HELPERS
@@ -54,19 +70,9 @@ QUESTION_TYPES = [
     "multiple_answer"
 ]
 
-def lmstudio_generate(prompt):
+async def lmstudio_generate(prompt):
     try:
-        resp = requests.post(
-            LMSTUDIO_URL,
-            json={
-                "model": LMSTUDIO_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.55,
-                "max_tokens": 350
-            },
-            timeout=30
-        ).json()
-        return resp["choices"][0]["message"]["content"]
+        return await llm.generate(None, prompt, temperature=0.55, max_tokens=350)
     except Exception as e:
         print("LM Studio ERROR:", e)
         return None
@@ -84,28 +90,16 @@ def clean_json(text):
 
 
 def get_random_topic():
-    """Extract topics from Qdrant payloads."""
-    try:
-        items, _ = qdrant.scroll(
-            collection_name=COLLECTION_NAME,
-            with_payload=True,
-            limit=200
-        )
-        topics = set()
-        for p in items:
-            md = p.payload
-            if md and "topic" in md:
-                topics.add(md["topic"])
-        return random.choice(list(topics)) if topics else "network security"
-    except:
-        return "network security"
+    """Random topic label from the catalog written by the ingestion (reloaded after re-ingestion)."""
+    topic_catalog.sync_version(read_ingest_version())
+    return topic_catalog.random_label()
 
 
 # ============================================================
 # QUESTION GENERATION
 # ============================================================
 
-def generate_question(topic=None):
+async def generate_question(topic=None):
     if not topic:
         topic = get_random_topic()
 
@@ -150,7 +144,7 @@ IMPORTANT:
 - No text outside JSON.
 """
 
-    raw = lmstudio_generate(prompt)
+    raw = await lmstudio_generate(prompt)
     if not raw:
         return fallback_question()
 
@@ -246,7 +240,7 @@ async def home(request: Request):
 
 @app.post("/generate", response_class=HTMLResponse)
 async def generate_quiz(request: Request, topic: str = Form(None)):
-    quiz = [generate_question(topic) for _ in range(NUM_QUESTIONS)]
+    quiz = await asyncio.gather(*(generate_question(topic) for _ in range(NUM_QUESTIONS)))
     html = render_template("quiz.html", quiz=quiz, results=None)
     return HTMLResponse(html)
 
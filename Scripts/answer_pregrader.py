@@ -0,0 +1,145 @@
+"""
+Embedding-based first pass for grading open-ended quiz answers.
+
+The student answer (whole and per sentence), the model answer and every key
+point are embedded in one batch. A key point counts as covered when some
+part of the answer is close enough to it; the pre-grade blends key-point
+coverage with the similarity to the model answer. Clear-cut answers are
+decided here without an LLM call:
+
+    - "reject"    blank-ish answers (no letters or digits) and scores at or below the low bound
+    - "accept"    near-verbatim model answers and scores at or above the high bound
+    - "escalate"  everything in between goes to the LLM grader, as do short
+                  answers (fewer than min_words words) that would be rejected:
+                  "SYN cookies" can be right but embeds far from a full model answer
+
+A small random share of the decided answers can still be sent to the LLM
+(audit_rate); record_audit() tallies how often both graders agree, so the
+bounds can be tuned against the LLM grades.
+"""
+
+import random
+import re
+import threading
+
+import numpy as np
+
+from context_packer import split_sentences, _normalise_rows
+
+PASS_SCORE = 0.7  # same cut-off as the LLM grading ("excellent")
+ALPHANUMERIC = re.compile(r"[^\W_]")
+
+
+class AnswerPreGrader:
+    def __init__(self, encode_fn, low=0.3, high=0.8, point_threshold=0.6,
+                 copy_threshold=0.97, min_words=3, audit_rate=0.0):
+        # encode_fn: list[str] -> 2D array-like, one row per text
+        self.encode_fn = encode_fn
+        self.low = low
+        self.high = high
+        self.point_threshold = point_threshold
+        self.copy_threshold = copy_threshold
+        self.min_words = min_words
+        self.audit_rate = audit_rate
+        self._lock = threading.Lock()
+        self.counters = {
+            "graded": 0, "accepted": 0, "rejected": 0, "escalated": 0,
+            "audited": 0, "audit_agreements": 0, "audit_abs_error": 0.0
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def grade(self, answer, model_answer, key_points):
+        """
+        Returns {"decision", "score", "similarity", "coverage", "covered", "missed"};
+        decision is "accept", "reject" or "escalate".
+        """
+        answer = " ".join((answer or "").split())
+        key_points = [p for p in key_points or [] if isinstance(p, str) and p.strip()]
+        self._count("graded")
+
+        if not ALPHANUMERIC.search(answer):
+            return self._decide("reject", 0.0, 0.0, 0.0, [], key_points)
+        if not model_answer and not key_points:
+            return self._decide("escalate", 0.0, 0.0, 0.0, [], [])
+
+        sentences = split_sentences(answer)
+        units = [answer] + (sentences if len(sentences) > 1 else [])
+        references = ([model_answer] if model_answer else []) + key_points
+        vectors = _normalise_rows(np.asarray(self.encode_fn(units + references), dtype=np.float32))
+        answer_vectors, reference_vectors = vectors[:len(units)], vectors[len(units):]
+
+        similarity = float(answer_vectors[0] @ reference_vectors[0]) if model_answer else 0.0
+        point_vectors = reference_vectors[1:] if model_answer else reference_vectors
+        covered, missed = [], []
+        if key_points:
+            best = (answer_vectors @ point_vectors.T).max(axis=0)
+            for point, score in zip(key_points, best):
+                (covered if score >= self.point_threshold else missed).append(point)
+        coverage = len(covered) / len(key_points) if key_points else 0.0
+
+        if model_answer and similarity >= self.copy_threshold:
+            return self._decide("accept", 1.0, similarity, 1.0 if key_points else 0.0, key_points, [])
+
+        # Model-answer similarity rescaled so unrelated text (~0.2) maps to 0 and paraphrases to ~1
+        closeness = min(1.0, max(0.0, (similarity - 0.2) / 0.65))
+        if key_points and model_answer:
+            score = 0.7 * coverage + 0.3 * closeness
+        else:
+            score = coverage if key_points else closeness
+
+        if score <= self.low:
+            decision = "escalate" if len(answer.split()) < self.min_words else "reject"
+        elif score >= self.high:
+            decision = "accept"
+        else:
+            decision = "escalate"
+        return self._decide(decision, score, similarity, coverage, covered, missed)
+
+    def _decide(self, decision, score, similarity, coverage, covered, missed):
+        self._count({"accept": "accepted", "reject": "rejected", "escalate": "escalated"}[decision])
+        return {
+            "decision": decision,
+            "score": round(score, 2),
+            "similarity": round(similarity, 4),
+            "coverage": round(coverage, 4),
+            "covered": covered,
+            "missed": missed
+        }
+
+    def should_audit(self):
+        """True for a random audit_rate share of the decided answers."""
+        return self.audit_rate > 0 and random.random() < self.audit_rate
+
+    def record_audit(self, pre_score, llm_score):
+        """Compares a decided pre-grade with the LLM grade of the same answer."""
+        with self._lock:
+            self.counters["audited"] += 1
+            self.counters["audit_abs_error"] += abs(pre_score - llm_score)
+            if (pre_score >= PASS_SCORE) == (llm_score >= PASS_SCORE):
+                self.counters["audit_agreements"] += 1
+
+    @staticmethod
+    def feedback(pre):
+        parts = []
+        if pre["covered"] or pre["missed"]:
+            parts.append(f"Covers {len(pre['covered'])} of {len(pre['covered']) + len(pre['missed'])} key points.")
+        if pre["missed"]:
+            parts.append("Missing: " + "; ".join(pre["missed"]))
+        if not parts:
+            parts.append("Answer matches the model answer." if pre["score"] >= PASS_SCORE
+                         else "Answer is too short or unrelated to the question.")
+        return " ".join(parts)
+
+    def stats(self):
+        graded = self.counters["graded"]
+        audited = self.counters["audited"]
+        return {
+            **self.counters,
+            "audit_abs_error": round(self.counters["audit_abs_error"], 4),
+            "llm_skip_rate": round(1 - self.counters["escalated"] / graded, 4) if graded else 0.0,
+            "agreement_rate": round(self.counters["audit_agreements"] / audited, 4) if audited else None,
+            "mean_abs_error": round(self.counters["audit_abs_error"] / audited, 4) if audited else None
+        }
@@ -0,0 +1,94 @@
+"""
+Parity check + throughput benchmark for the embedding backends.
+
+Encodes pages from References/ with the torch model and with each selected
+backend, then reports the cosine agreement against torch and texts/sec.
+Exits non-zero if any backend falls below --min-cosine, so it can be used
+as a gate before switching EMBED_BACKEND for the app or ingestion.
+
+    python Scripts/benchmark_embeddings.py --backends onnx onnx-int8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from pypdf import PdfReader
+
+from embedding_backends import load_encoder, BACKENDS
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def sample_texts(directory, limit):
+    texts = []
+    for pdf_file in sorted(Path(directory).glob("*.pdf")):
+        try:
+            for page in PdfReader(pdf_file).pages:
+                text = page.extract_text()
+                if text and text.strip():
+                    texts.append(text)
+                if len(texts) >= limit:
+                    return texts
+        except Exception as e:
+            print(f"⚠ Skipping {pdf_file.name}: {e}")
+    return texts
+
+
+def encode_timed(model, texts, batch_size, repeats):
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warmup
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        vectors = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        best = min(best, time.perf_counter() - started)
+    return np.asarray(vectors, dtype=np.float32), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], choices=BACKENDS)
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    references = Path(__file__).parent.parent / "References"
+    texts = sample_texts(references, args.samples)
+    if not texts:
+        print(f"❌ No text found in {references}")
+        return 1
+    print(f"Benchmarking {args.model} on {len(texts)} pages (batch size {args.batch_size})\n")
+
+    baseline = load_encoder(args.model, backend="torch")
+    reference, torch_seconds = encode_timed(baseline, texts, args.batch_size, args.repeats)
+    print(f"{'backend':<12}{'texts/sec':>12}{'speedup':>10}{'mean cos':>10}{'min cos':>10}")
+    print(f"{'torch':<12}{len(texts) / torch_seconds:>12.1f}{1.0:>10.2f}{1.0:>10.4f}{1.0:>10.4f}")
+
+    failed = False
+    for backend in args.backends:
+        model = load_encoder(args.model, backend=backend)
+        if model.embed_backend != backend:
+            print(f"{backend:<12}{'unavailable (fell back to torch)':>42}")
+            failed = True
+            continue
+
+        vectors, seconds = encode_timed(model, texts, args.batch_size, args.repeats)
+        cosines = np.sum(reference * vectors, axis=1)
+        print(
+            f"{backend:<12}{len(texts) / seconds:>12.1f}{torch_seconds / seconds:>10.2f}"
+            f"{cosines.mean():>10.4f}{cosines.min():>10.4f}"
+        )
+        if cosines.min() < args.min_cosine:
+            print(f"   ❌ {backend} parity below {args.min_cosine}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
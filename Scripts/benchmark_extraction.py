@@ -0,0 +1,66 @@
+"""
+Benchmark of the PDF extraction backends on References/.
+
+For every available backend it times a cold extraction of each PDF, then
+times reading the same pages back from the gzip JSONL text corpus, and
+reports pages/sec, extracted characters and corpus size.
+
+    python Scripts/benchmark_extraction.py [--backends pypdf pdfplumber]
+"""
+
+import argparse
+import importlib.util
+import tempfile
+import time
+from pathlib import Path
+
+from pdf_extraction import EXTRACTORS, load_or_extract, shard_path
+
+
+def available(backend):
+    return importlib.util.find_spec(backend) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF extraction backends and the text corpus.")
+    parser.add_argument("--backends", nargs="+", default=list(EXTRACTORS), choices=list(EXTRACTORS))
+    parser.add_argument("--directory", default=str(Path(__file__).parent.parent / "References"))
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.directory).glob("*.pdf"))
+    if not pdf_files:
+        print(f"❌ No PDFs found in {args.directory}")
+        return
+    print(f"Benchmarking extraction on {len(pdf_files)} PDF(s)\n")
+    print(f"{'backend':<12}{'pages':>7}{'chars':>11}{'extract p/s':>13}{'corpus p/s':>12}{'corpus MB':>11}")
+
+    for backend in args.backends:
+        if not available(backend):
+            print(f"{backend:<12} not installed — skipped")
+            continue
+
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            started = time.perf_counter()
+            pages = chars = 0
+            for pdf_file in pdf_files:
+                extracted, _ = load_or_extract(pdf_file, backend, corpus_dir)
+                pages += len(extracted)
+                chars += sum(len(text) for _, text in extracted)
+            extract_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for pdf_file in pdf_files:
+                _, from_corpus = load_or_extract(pdf_file, backend, corpus_dir)
+                assert from_corpus
+            corpus_seconds = time.perf_counter() - started
+
+            corpus_bytes = sum(shard_path(f, backend, corpus_dir).stat().st_size for f in pdf_files)
+
+        print(
+            f"{backend:<12}{pages:>7}{chars:>11}{pages / extract_seconds:>13.1f}"
+            f"{pages / corpus_seconds:>12.1f}{corpus_bytes / 1e6:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
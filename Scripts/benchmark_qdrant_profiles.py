@@ -0,0 +1,159 @@
+"""
+Benchmark of the Qdrant collection profiles (see qdrant_profiles.py).
+
+For every profile the vectors of the live collection (or of the index
+artifact) are loaded into a temporary collection `bench_<profile>`, a sample
+of stored vectors is used as queries, and each result list is compared with
+an exact brute-force search. Reports recall@k, p50/p99 query latency and
+the estimated resident memory of vectors, payloads and HNSW links.
+
+The benchmark collections use tiny indexing / full-scan thresholds and are
+only queried once the optimizer has built the index (status green, every
+vector indexed); otherwise a collection this small would be served by exact
+search and every profile would measure the same thing.
+
+    python Scripts/benchmark_qdrant_profiles.py [--source qdrant|artifact] [--queries 200] [--k 10]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import CollectionStatus, HnswConfigDiff, OptimizersConfigDiff, PointStruct
+
+from index_artifact import COLLECTION_NAME, INDEX_ARTIFACT, read_artifact
+from local_index import scroll_points
+from qdrant_profiles import PROFILES, collection_kwargs, estimated_ram_bytes, search_params
+
+UPLOAD_BATCH = 256
+# KB; far below the defaults (20000 / 10000) so even small collections get an HNSW index
+BENCH_INDEXING_THRESHOLD = 1
+BENCH_FULL_SCAN_THRESHOLD = 1
+INDEX_TIMEOUT = 600
+
+
+def load_points(client, source, artifact):
+    """Returns (ids, float32 vectors, payloads) from the collection or the artifact."""
+    if source == "artifact":
+        _, ids, vectors, payloads = read_artifact(artifact)
+        return ids, np.asarray(vectors, dtype=np.float32), payloads
+    ids, vectors, payloads = [], [], []
+    for pid, vector, payload in scroll_points(client, COLLECTION_NAME):
+        ids.append(pid)
+        vectors.append(np.asarray(vector, dtype=np.float32))
+        payloads.append(payload)
+    return ids, np.stack(vectors), payloads
+
+
+def build_collection(client, name, profile, ids, vectors, payloads):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    kwargs = collection_kwargs(vectors.shape[1], profile)
+    hnsw = kwargs.get("hnsw_config") or HnswConfigDiff()
+    kwargs["hnsw_config"] = hnsw.model_copy(update={"full_scan_threshold": BENCH_FULL_SCAN_THRESHOLD})
+    kwargs["optimizers_config"] = OptimizersConfigDiff(indexing_threshold=BENCH_INDEXING_THRESHOLD)
+    client.create_collection(collection_name=name, **kwargs)
+    for start in range(0, len(ids), UPLOAD_BATCH):
+        client.upsert(
+            collection_name=name,
+            points=[
+                PointStruct(id=pid, vector=vector.tolist(), payload=payload)
+                for pid, vector, payload in zip(
+                    ids[start:start + UPLOAD_BATCH],
+                    vectors[start:start + UPLOAD_BATCH],
+                    payloads[start:start + UPLOAD_BATCH]
+                )
+            ],
+            wait=True
+        )
+    wait_until_indexed(client, name, len(ids))
+
+
+def wait_until_indexed(client, name, count, timeout=INDEX_TIMEOUT):
+    """Blocks until the optimizer is idle and the HNSW index covers every vector."""
+    deadline = time.monotonic() + timeout
+    while True:
+        info = client.get_collection(name)
+        if info.status == CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= count:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(
+                f"{name}: index not built after {timeout}s "
+                f"(status {info.status}, {info.indexed_vectors_count}/{count} vectors indexed)"
+            )
+        time.sleep(0.5)
+
+
+def exact_top_k(vectors, queries, k):
+    """Brute-force cosine top-k (row indices) for every query."""
+    normed = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    scores = queries @ normed.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def run_profile(client, name, profile, ids, queries, truth, k):
+    params = search_params(profile)
+    row_of = {str(pid): row for row, pid in enumerate(ids)}
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = client.query_points(
+            collection_name=name,
+            query=query.tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False,
+            with_vectors=False
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({row_of[str(p.id)] for p in result.points} & expected)
+    return hits / (k * len(queries)), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant collection profiles.")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--source", choices=["qdrant", "artifact"], default="qdrant")
+    parser.add_argument("--artifact", default=str(INDEX_ARTIFACT))
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_<profile> collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(host=args.host, port=args.port)
+    ids, vectors, payloads = load_points(client, args.source, args.artifact)
+    if len(ids) <= args.k:
+        print(f"❌ Need more than {args.k} points, found {len(ids)}")
+        return
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = vectors[sample] / np.maximum(np.linalg.norm(vectors[sample], axis=1, keepdims=True), 1e-12)
+    truth = exact_top_k(vectors, queries, args.k)
+    payload_bytes = sum(len(json.dumps(p, ensure_ascii=False).encode("utf-8")) for p in payloads)
+
+    print(f"Benchmarking {len(args.profiles)} profile(s) on {len(ids)} points, {len(queries)} queries, k={args.k}\n")
+    print(f"{'profile':<13}{'recall@k':>10}{'p50 ms':>9}{'p99 ms':>9}{'est. RAM MB':>13}{'build s':>9}")
+
+    for profile in args.profiles:
+        name = f"bench_{profile}"
+        started = time.perf_counter()
+        build_collection(client, name, profile, ids, vectors, payloads)
+        build_seconds = time.perf_counter() - started
+        try:
+            recall, p50, p99 = run_profile(client, name, profile, ids, queries, truth, args.k)
+        finally:
+            if not args.keep:
+                client.delete_collection(name)
+        ram = estimated_ram_bytes(len(ids), vectors.shape[1], profile, payload_bytes)
+        print(f"{profile:<13}{recall:>10.3f}{p50:>9.2f}{p99:>9.2f}{ram / 1e6:>13.1f}{build_seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark of the Qdrant transports for the chat retrieval query.
+
+Runs the query the app sends (top-k, score threshold, document payload
+fields) with stored vectors as queries over REST and gRPC, each with the
+sync client (one query at a time) and the async client (`--concurrency`
+queries in flight), and reports p50/p99 latency and queries/sec.
+
+    python Scripts/benchmark_qdrant_transport.py [--queries 300] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, AsyncQdrantClient
+
+from qdrant_profiles import search_params
+from retrieval import DOCUMENT_FIELDS, client_kwargs, search, asearch
+
+COLLECTION_NAME = "network_security_docs"
+
+
+def sample_queries(client, count):
+    records, _ = client.scroll(collection_name=COLLECTION_NAME, limit=count, with_payload=False, with_vectors=True)
+    return [list(r.vector) for r in records]
+
+
+def report(label, latencies, seconds):
+    latencies = np.asarray(latencies)
+    print(
+        f"{label:<14}{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 99):>9.2f}"
+        f"{len(latencies) / seconds:>10.1f}"
+    )
+
+
+def run_sync(kwargs, queries, options):
+    client = QdrantClient(**kwargs)
+    search(client, COLLECTION_NAME, queries[0], **options)  # warm the connection
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        search(client, COLLECTION_NAME, query, **options)
+        latencies.append((time.perf_counter() - t) * 1000)
+    seconds = time.perf_counter() - started
+    client.close()
+    return latencies, seconds
+
+
+async def run_async(kwargs, queries, options, concurrency):
+    client = AsyncQdrantClient(**kwargs)
+    await asearch(client, COLLECTION_NAME, queries[0], **options)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with semaphore:
+            t = time.perf_counter()
+            await asearch(client, COLLECTION_NAME, query, **options)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    seconds = time.perf_counter() - started
+    await client.close()
+    return latencies, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant REST and gRPC latency.")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--grpc-port", type=int, default=int(os.getenv("QDRANT_GRPC_PORT", "6334")))
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.40)
+    args = parser.parse_args()
+
+    rest = client_kwargs(args.host, args.port, args.grpc_port, prefer_grpc=False)
+    grpc = client_kwargs(args.host, args.port, args.grpc_port, prefer_grpc=True)
+    queries = sample_queries(QdrantClient(**rest), args.queries)
+    if not queries:
+        print(f"❌ Collection '{COLLECTION_NAME}' is empty")
+        return
+    options = {"limit": args.k, "score_threshold": args.threshold, "fields": DOCUMENT_FIELDS,
+               "params": search_params()}
+
+    print(f"{len(queries)} queries, k={args.k}, async concurrency={args.concurrency}\n")
+    print(f"{'transport':<14}{'p50 ms':>9}{'p99 ms':>9}{'q/s':>10}")
+    for label, kwargs in (("REST", rest), ("gRPC", grpc)):
+        report(f"{label} sync", *run_sync(kwargs, queries, options))
+        report(f"{label} async", *asyncio.run(run_async(kwargs, queries, options, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,37 @@
 import os
+import sys
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 import requests
 from fastapi import FastAPI, Request, Form
 from fastapi.responses import HTMLResponse
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from pydantic import BaseModel
 
+sys.path.insert(0, str(Path(__file__).parent))
+from llm_client import LLMClient, LLMError
+from retrieval import DOCUMENT_FIELDS, client_kwargs, asearch, hits_to_docs
+
 # ============================================================
 # 1. SETUP & CONFIGURATION
 # ============================================================
 
-app = FastAPI(title="Network Security Tutor (LM Studio GPU + Qdrant)")
+@asynccontextmanager
+async def lifespan(app):
+    global aqdrant
+    if qdrant is not None:
+        aqdrant = AsyncQdrantClient(**QDRANT_CLIENT_KWARGS)
+    yield
+    if aqdrant is not None:
+        await aqdrant.close()
+        aqdrant = None
+    await llm.aclose()
+
+
+app = FastAPI(title="Network Security Tutor (LM Studio GPU + Qdrant)", lifespan=lifespan)
 
 # Paths
 script_dir = Path(__file__).parent
@@ -31,14 +50,19 @@ def render_template(name, **kwargs):
     return jinja_env.get_template(name).render(**kwargs)
 
 # Configuration
-QDRANT_HOST = "localhost"
-QDRANT_PORT = 6333
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+QDRANT_CLIENT_KWARGS = client_kwargs(QDRANT_HOST, QDRANT_PORT, QDRANT_GRPC_PORT, QDRANT_PREFER_GRPC)
 COLLECTION_NAME = "network_security_docs"
 RELEVANCE_THRESHOLD = 0.40
+TOP_K = 10
 
 # LM Studio API endpoint (local)
 LMSTUDIO_URL = "http://localhost:1234/v1/chat/completions"
 LMSTUDIO_MODEL = "meta-llama-3.1-8b-instruct"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
 
 # ============================================================
 # 2. LOAD MODELS
@@ -52,14 +76,18 @@ embedder = SentenceTransformer("all-MiniLM-L6-v2")
 
 # 2. Qdrant Client
 print(f"2. Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}…")
+aqdrant = None  # AsyncQdrantClient used by the request path, opened by the lifespan
 try:
-    qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    qdrant = QdrantClient(**QDRANT_CLIENT_KWARGS)
     qdrant.get_collections()
     print("   ✔ Connected to Qdrant.\n")
 except Exception as e:
     print("   ❌ Qdrant Connection Failed:", e)
     qdrant = None
 
+# 3. Shared LLM client
+llm = LLMClient(LMSTUDIO_URL, LMSTUDIO_MODEL, timeout=LLM_TIMEOUT)
+
 print("--- STARTUP COMPLETE ---\n")
 
 
@@ -67,32 +95,15 @@ print("--- STARTUP COMPLETE ---\n")
 # 3. FUNCTIONS: LM STUDIO GPU LLM
 # ============================================================
 
-def lm_studio_generate(system_prompt, user_prompt):
+async def lm_studio_generate(system_prompt, user_prompt):
     """
     Sends prompt to LM Studio (GPU accelerated local API).
     """
     try:
-        response = requests.post(
-            LMSTUDIO_URL,
-            json={
-                "model": LMSTUDIO_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 400,
-                "stream": False
-            }
-        )
-
-        if response.status_code != 200:
-            print("LM Studio API Error:", response.text)
-            return "Error: LLM request failed."
-
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
-
+        return await llm.generate(system_prompt, user_prompt, temperature=0.1, max_tokens=400)
+    except LLMError as e:
+        print("LM Studio API Error:", e)
+        return "Error: LLM request failed."
     except Exception as e:
         return f"LM Studio Connection Error: {str(e)}"
 
@@ -101,38 +112,21 @@ def lm_studio_generate(system_prompt, user_prompt):
 # 4. QDRANT SEMANTIC SEARCH
 # ============================================================
 
-def find_relevant_documents(prompt: str):
-    """Encodes prompt + searches Qdrant."""
-    if not qdrant:
+async def find_relevant_documents(prompt: str):
+    """Encodes prompt + searches Qdrant (threshold, top-k and payload fields applied server-side)."""
+    if aqdrant is None:
         return []
 
-    embed = embedder.encode(prompt).tolist()
-
+    embed = (await asyncio.to_thread(embedder.encode, prompt)).tolist()
 
     try:
-        results = qdrant.query_points(
-            collection_name=COLLECTION_NAME,
-            query=embed,
-            with_payload=True,
-            with_vectors=False
+        hits = await asearch(
+            aqdrant, COLLECTION_NAME, embed,
+            limit=TOP_K,
+            score_threshold=RELEVANCE_THRESHOLD,
+            fields=DOCUMENT_FIELDS
         )
-
-        hits = results.points
-        docs = []
-
-        print(hits)
-
-        for h in hits:
-            payload = h.payload or {}
-            docs.append({
-                "document_name": payload.get("document", "Unknown"),
-                "page_number": payload.get("page_number", 0),
-                "reference": payload.get("text", ""),
-                "similarity": h.score
-            })
-
-        # Apply threshold filter
-        return [d for d in docs if d["similarity"] >= RELEVANCE_THRESHOLD]
+        return hits_to_docs(hits)
 
     except Exception as e:
         print("Qdrant Error:", e)
@@ -143,8 +137,8 @@ def find_relevant_documents(prompt: str):
 # 5. CORE LOGIC
 # ============================================================
 
-def generate_response_logic(prompt):
-    docs = find_relevant_documents(prompt)
+async def generate_response_logic(prompt):
+    docs = await find_relevant_documents(prompt)
 
     if docs:
         context = "\n\n".join(
@@ -159,7 +153,7 @@ CONTEXT:
 {context}
 """
 
-        response = lm_studio_generate(system_prompt, prompt)
+        response = await lm_studio_generate(system_prompt, prompt)
 
         sources = "\n".join(
             f"📄 {d['document_name']} (Pg {d['page_number']}) — Score: {d['similarity']:.2f}"
@@ -169,7 +163,7 @@ CONTEXT:
         return response, sources
 
     # No docs → Web search
-    snippet, src = web_search(prompt)
+    snippet, src = await asyncio.to_thread(web_search, prompt)
     return snippet, src
 
 
@@ -214,14 +208,14 @@ def home(request: Request):
 
 
 @app.post("/query", response_model=QueryResponse)
-def api_query(req: QueryRequest):
-    response, source = generate_response_logic(req.prompt)
+async def api_query(req: QueryRequest):
+    response, source = await generate_response_logic(req.prompt)
     return QueryResponse(response=response, source=source)
 
 
 @app.post("/query-form", response_class=HTMLResponse)
-def form_query(request: Request, prompt: str = Form(...)):
-    response, source = generate_response_logic(prompt)
+async def form_query(request: Request, prompt: str = Form(...)):
+    response, source = await generate_response_logic(prompt)
     html = render_template("index.html", prompt=prompt, response=response, source=source)
     return HTMLResponse(html)
 
@@ -0,0 +1,117 @@
+"""
+Token-aware chunking for ingestion.
+
+MiniLM encoders silently truncate input at 256 word pieces, so embedding a
+whole PDF page leaves most of it unindexed. chunk_text() splits a page into
+sliding windows of whole sentences that fit a token budget, with a token
+overlap between neighbouring windows; a sentence longer than the budget is
+split into overlapping word windows. Every chunk carries its character
+offsets into the page text.
+"""
+
+import re
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+
+
+def approx_token_count(text):
+    # ~1.3 word pieces per whitespace word for English prose
+    return int(len(text.split()) * 1.3) + 1
+
+
+def sentence_spans(text):
+    """Yields (start, end) character spans of the sentences in `text`."""
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        if text[start:match.start()].strip():
+            yield start, match.start()
+        start = match.end()
+    if text[start:].strip():
+        yield start, len(text)
+
+
+def _word_windows(text, start, end, max_tokens, overlap, count_tokens):
+    """
+    Splits one over-long sentence (e.g. slide text without punctuation) into
+    windows of whole words, each within max_tokens and overlapping the
+    previous one by up to `overlap` tokens. Word costs are counted once and
+    summed, so long spans stay linear (WordPiece tokenizes word by word).
+    """
+    words = list(re.finditer(r"\S+", text[start:end]))
+    costs = [count_tokens(w.group()) for w in words]
+    windows = []
+    first = 0
+    while first < len(words):
+        last = first
+        used = costs[first]
+        while last + 1 < len(words) and used + costs[last + 1] <= max_tokens:
+            last += 1
+            used += costs[last]
+        windows.append((start + words[first].start(), start + words[last].end()))
+
+        if last + 1 >= len(words):
+            break
+        next_first = last + 1
+        carried = 0
+        while next_first - 1 > first and carried + costs[next_first - 1] <= overlap:
+            next_first -= 1
+            carried += costs[next_first]
+        first = next_first
+    return windows
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, count_tokens=approx_token_count):
+    """
+    Returns a list of chunks:
+        {"text", "chunk_index", "char_start", "char_end", "token_count"}
+    """
+    if not text or not text.strip():
+        return []
+
+    spans = list(sentence_spans(text))
+    costs = [count_tokens(text[s:e]) for s, e in spans]
+    chunks = []
+
+    def emit(char_start, char_end):
+        chunk = text[char_start:char_end].strip()
+        chunks.append({
+            "text": chunk,
+            "chunk_index": len(chunks),
+            "char_start": char_start,
+            "char_end": char_end,
+            "token_count": count_tokens(chunk)
+        })
+
+    first = 0
+    while first < len(spans):
+        if costs[first] > max_tokens:
+            # Over-long sentence: overlapping word windows of its own
+            for char_start, char_end in _word_windows(text, *spans[first], max_tokens, overlap, count_tokens):
+                emit(char_start, char_end)
+            first += 1
+            continue
+
+        last = first
+        used = costs[first]
+        while last + 1 < len(spans) and costs[last + 1] <= max_tokens and used + costs[last + 1] <= max_tokens:
+            last += 1
+            used += costs[last]
+        emit(spans[first][0], spans[last][1])
+
+        if last + 1 >= len(spans):
+            break
+
+        # Start the next window far enough back to overlap by ~`overlap` tokens
+        # (not before an over-long sentence, which gets windows of its own)
+        next_first = last + 1
+        carried = 0
+        while costs[last + 1] <= max_tokens and next_first - 1 > first \
+                and carried + costs[next_first - 1] <= overlap:
+            next_first -= 1
+            carried += costs[next_first]
+        first = next_first
+
+    return chunks
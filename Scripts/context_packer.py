@@ -0,0 +1,160 @@
+"""
+Token-budgeted context assembly for the chatbot prompt.
+
+Instead of pasting every retrieved page into the system prompt, hits are
+taken in score order, near-duplicate passages are dropped, each page is
+trimmed to the sentences most similar to the query, and packing stops once
+the token budget is spent. Token counts are estimated (~4 characters per
+token), which is close enough for budgeting Llama-style tokenizers.
+
+Sentence vectors are kept in an LRU keyed by point ID, so a page that keeps
+coming back for related questions is split and encoded once. Point IDs are
+derived from the chunk content, so re-ingested (changed) chunks get new keys.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4) if text else 0
+
+
+def split_sentences(text):
+    sentences = []
+    for part in SENTENCE_SPLIT.split(text or ""):
+        part = " ".join(part.split())
+        if len(part) >= 20:
+            sentences.append(part)
+    return sentences
+
+
+def _normalise_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ContextPacker:
+    def __init__(self, encode_fn, token_budget=1200, max_sentences=8, dup_threshold=0.92, cache_size=4096):
+        # encode_fn: list[str] -> 2D array-like (one embedding per sentence)
+        self.encode_fn = encode_fn
+        self.token_budget = token_budget
+        self.max_sentences = max_sentences
+        self.dup_threshold = dup_threshold
+        self.cache_size = cache_size
+        self._sentence_cache = OrderedDict()  # point_id -> (sentences, normalised vectors)
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "tokens_before": 0, "tokens_after": 0, "docs_in": 0, "docs_out": 0,
+                         "duplicates_dropped": 0, "sentence_cache_hits": 0, "sentence_cache_misses": 0}
+
+    def _sentence_vectors(self, docs):
+        """(sentences, normalised vectors) per doc; cached by point_id, misses encoded in one batch."""
+        results = [None] * len(docs)
+        missing = []
+        with self._lock:
+            for i, doc in enumerate(docs):
+                entry = self._sentence_cache.get(doc.get("point_id"))
+                if entry is not None:
+                    self._sentence_cache.move_to_end(doc["point_id"])
+                    results[i] = entry
+                else:
+                    missing.append(i)
+            self.counters["sentence_cache_hits"] += len(docs) - len(missing)
+            self.counters["sentence_cache_misses"] += len(missing)
+
+        per_doc = [split_sentences(docs[i]["reference"]) for i in missing]
+        flat = [s for sentences in per_doc for s in sentences]
+        vectors = _normalise_rows(np.asarray(self.encode_fn(flat), dtype=np.float32)) if flat else None
+        offset = 0
+        with self._lock:
+            for i, sentences in zip(missing, per_doc):
+                entry = (sentences, vectors[offset:offset + len(sentences)].copy() if sentences else None)
+                offset += len(sentences)
+                results[i] = entry
+                point_id = docs[i].get("point_id")
+                if point_id is not None and self.cache_size:
+                    self._sentence_cache[point_id] = entry
+                    while len(self._sentence_cache) > self.cache_size:
+                        self._sentence_cache.popitem(last=False)
+        return results
+
+    def pack(self, query_vector, docs):
+        """
+        Returns a new list of docs (same keys as find_relevant_documents) whose
+        'reference' holds only the selected sentences, plus per-request metrics.
+        """
+        docs = sorted(docs, key=lambda d: d["similarity"], reverse=True)
+        tokens_before = sum(estimate_tokens(d["reference"]) for d in docs)
+
+        packed = []
+        used = 0
+        duplicates = 0
+
+        if docs:
+            query = np.asarray(query_vector, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+
+            kept_doc_vectors = []
+            for doc, (sentences, doc_vectors) in zip(docs, self._sentence_vectors(docs)):
+                if not sentences:
+                    continue
+                doc_scores = doc_vectors @ query
+
+                # Near-duplicate page (e.g. the same slide in two decks)
+                doc_vector = _normalise_rows(doc_vectors.mean(axis=0, keepdims=True))[0]
+                if any(float(doc_vector @ v) >= self.dup_threshold for v in kept_doc_vectors):
+                    duplicates += 1
+                    continue
+
+                # Best sentences first, then restored to reading order
+                ranked = np.argsort(-doc_scores)[:self.max_sentences]
+                chosen = []
+                for idx in ranked:
+                    cost = estimate_tokens(sentences[idx])
+                    if used + cost > self.token_budget:
+                        continue
+                    chosen.append(int(idx))
+                    used += cost
+                if not chosen:
+                    if used >= self.token_budget:
+                        break
+                    continue
+
+                kept_doc_vectors.append(doc_vector)
+                packed.append({**doc, "reference": " ".join(sentences[i] for i in sorted(chosen))})
+
+        if not packed and docs:
+            # Nothing sentence-shaped (tables, code listings): keep the top page, truncated
+            top = docs[0]["reference"][:self.token_budget * 4]
+            packed.append({**docs[0], "reference": top})
+            used = estimate_tokens(top)
+
+        metrics = {
+            "tokens_before": tokens_before,
+            "tokens_after": used,
+            "tokens_saved": tokens_before - used,
+            "docs_in": len(docs),
+            "docs_out": len(packed),
+            "duplicates_dropped": duplicates
+        }
+        self.counters["requests"] += 1
+        for key in ("tokens_before", "tokens_after", "docs_in", "docs_out", "duplicates_dropped"):
+            self.counters[key] += metrics[key]
+        return packed, metrics
+
+    def stats(self):
+        requests = self.counters["requests"]
+        saved = self.counters["tokens_before"] - self.counters["tokens_after"]
+        return {
+            **self.counters,
+            "tokens_saved": saved,
+            "sentence_cache_entries": len(self._sentence_cache),
+            "avg_tokens_saved_per_request": round(saved / requests, 1) if requests else 0.0,
+            "token_budget": self.token_budget
+        }
@@ -0,0 +1,44 @@
+"""
+Selectable inference backends for the SentenceTransformer encoders.
+
+EMBED_BACKEND chooses how a model is run:
+    torch      - default PyTorch fp32 model
+    onnx       - ONNX export run through onnxruntime
+    onnx-int8  - dynamically int8-quantized ONNX export (fastest on CPU)
+
+The ONNX variants are the same weights, tokenizer and pooling as the torch
+model, so their vectors stay compatible with the existing collection. If the
+ONNX runtime (optimum[onnxruntime]) is missing or the export cannot be
+loaded, we fall back to torch.
+"""
+
+import os
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# Quantized file shipped in the sentence-transformers hub repos; AVX2 works on any modern x86 CPU
+EMBED_ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_encoder(name, backend=None):
+    """Loads `name` with the requested backend, falling back to torch on failure."""
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or EMBED_BACKEND
+    if backend not in BACKENDS:
+        print(f"   [WARN] Unknown EMBED_BACKEND '{backend}', using torch.")
+        backend = "torch"
+
+    if backend != "torch":
+        model_kwargs = {"file_name": EMBED_ONNX_INT8_FILE} if backend == "onnx-int8" else {}
+        try:
+            model = SentenceTransformer(name, backend="onnx", model_kwargs=model_kwargs)
+            model.embed_backend = backend
+            return model
+        except Exception as e:
+            print(f"   [WARN] Could not load '{name}' with {backend} backend ({e}); falling back to torch.")
+
+    model = SentenceTransformer(name)
+    model.embed_backend = "torch"
+    return model
@@ -0,0 +1,101 @@
+"""
+Dynamic micro-batching for query embeddings.
+
+Concurrent callers await EmbeddingBatcher.encode(text). A single worker task
+collects queued texts until either max_batch texts are waiting or max_wait
+seconds have passed since the first one arrived, runs them through the
+encoder as one batch in a worker thread, and hands each caller its own vector.
+While one batch is encoding, new requests queue up and form the next batch.
+"""
+
+import asyncio
+from collections import Counter
+
+
+class EmbeddingBatcher:
+    def __init__(self, encode_fn, max_batch=32, max_wait=0.005):
+        # encode_fn: list[str] -> 2D array-like, one row per text
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+        self.counters = {"requests": 0, "batches": 0, "batched_requests": 0, "errors": 0}
+        self.batch_sizes = Counter()
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def encode(self, text):
+        """Queues one text and waits for its vector (as a list of floats)."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.counters["requests"] += 1
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Drop callers that gave up while waiting
+            batch = [(text, fut) for text, fut in batch if not fut.done()]
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await asyncio.to_thread(self.encode_fn, texts)
+            except Exception as e:
+                self.counters["errors"] += 1
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            self.counters["batches"] += 1
+            self.batch_sizes[len(batch)] += 1
+            if len(batch) > 1:
+                self.counters["batched_requests"] += len(batch)
+
+            for (_, fut), vector in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vector.tolist() if hasattr(vector, "tolist") else list(vector))
+
+    async def aclose(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self):
+        batches = self.counters["batches"]
+        requests = self.counters["requests"]
+        return {
+            **self.counters,
+            "avg_batch_size": round(sum(n * c for n, c in self.batch_sizes.items()) / batches, 2) if batches else 0.0,
+            # Share of requests that were encoded together with at least one other request
+            "batch_hit_rate": round(self.counters["batched_requests"] / requests, 4) if requests else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000
+        }
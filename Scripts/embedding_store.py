@@ -0,0 +1,229 @@
+"""
+Persistent on-disk embedding cache keyed by (model name, text hash).
+
+Each model gets its own directory under embedding_cache/:
+    meta.json     model name, dimension and dtype
+    keys.bin      append-only sha256 digests (32 bytes per row)
+    vectors.bin   append-only rows of `dim` float16/float32 values
+
+Vectors are read through a numpy memmap, so a lookup costs a page fault
+rather than loading the whole cache. Appends never rewrite existing rows;
+`compact` rewrites the files without duplicate rows and without rows no
+ingest manifest references any more (chunks of old chunking/model settings).
+The manifests record the sha256 of every stored chunk text, which is exactly
+the cache key.
+
+    python Scripts/embedding_store.py stats
+    python Scripts/embedding_store.py compact [--model all-MiniLM-L6-v2:torch] [--keep-unreferenced]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+CACHE_DIR = Path(os.getenv("EMBED_CACHE_DIR", str(Path(__file__).parent.parent / "embedding_cache")))
+CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float16")
+MANIFEST_DIR = Path(__file__).parent.parent
+KEY_BYTES = 32
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def model_slug(model_name):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+
+
+def manifest_keys(root=MANIFEST_DIR):
+    """Cache keys of every chunk recorded by the ingest manifests, or None if there are none."""
+    keys = None
+    for path in sorted(Path(root).glob("ingest_manifest_*.json")):
+        try:
+            files = json.loads(path.read_text()).get("files", {})
+        except (OSError, ValueError):
+            continue
+        keys = keys if keys is not None else set()
+        for entry in files.values():
+            for page in entry.get("pages", {}).values():
+                keys.update(bytes.fromhex(h) for h in page.get("chunks", []))
+    return keys
+
+
+class EmbeddingStore:
+    def __init__(self, model_name, dim, root=CACHE_DIR, dtype=CACHE_DTYPE):
+        self.model_name = model_name
+        self.dir = Path(root) / model_slug(model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.keys_path = self.dir / "keys.bin"
+        self.vectors_path = self.dir / "vectors.bin"
+        self.meta_path = self.dir / "meta.json"
+
+        if self.meta_path.exists():
+            meta = json.loads(self.meta_path.read_text())
+            if meta["dim"] != dim:
+                raise ValueError(f"Embedding cache for {model_name} has dim {meta['dim']}, expected {dim}")
+            dtype = meta["dtype"]
+        else:
+            self.meta_path.write_text(json.dumps({"model": model_name, "dim": dim, "dtype": dtype}))
+
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dim * self.dtype.itemsize
+        self.counters = {"hits": 0, "misses": 0, "appended": 0}
+        self._load_index()
+
+    def _load_index(self):
+        keys = self.keys_path.read_bytes() if self.keys_path.exists() else b""
+        vector_rows = (self.vectors_path.stat().st_size // self.row_bytes) if self.vectors_path.exists() else 0
+        # A crash between the two appends leaves one file longer; trust the shorter
+        # and cut both back to it, so later appends stay row-aligned
+        self.rows = min(len(keys) // KEY_BYTES, vector_rows)
+        for path, row_bytes in ((self.keys_path, KEY_BYTES), (self.vectors_path, self.row_bytes)):
+            if path.exists() and path.stat().st_size != self.rows * row_bytes:
+                os.truncate(path, self.rows * row_bytes)
+        self.index = {}
+        for row in range(self.rows):
+            self.index[keys[row * KEY_BYTES:(row + 1) * KEY_BYTES]] = row  # last write wins
+        self._memmap = None
+
+    def _vectors(self):
+        if self._memmap is None or self._memmap.shape[0] != self.rows:
+            self._memmap = (
+                np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.rows, self.dim))
+                if self.rows else np.empty((0, self.dim), dtype=self.dtype)
+            )
+        return self._memmap
+
+    def __len__(self):
+        return len(self.index)
+
+    def get_many(self, texts):
+        """Returns a list with a float32 vector per cached text and None for misses."""
+        keys = [text_key(t) for t in texts]
+        rows = [self.index.get(k) for k in keys]
+        found = [r for r in rows if r is not None]
+        vectors = self._vectors()[found].astype(np.float32) if found else None
+
+        out = []
+        i = 0
+        for row in rows:
+            if row is None:
+                out.append(None)
+                self.counters["misses"] += 1
+            else:
+                out.append(vectors[i])
+                i += 1
+                self.counters["hits"] += 1
+        return out
+
+    def put_many(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+        new = [(text_key(t), v) for t, v in zip(texts, vectors)]
+        new = [(k, v) for k, v in new if k not in self.index]
+        if not new:
+            return
+
+        with open(self.vectors_path, "ab") as vf:
+            vf.write(np.stack([v for _, v in new]).astype(self.dtype).tobytes())
+        with open(self.keys_path, "ab") as kf:
+            kf.write(b"".join(k for k, _ in new))
+
+        for key, _ in new:
+            self.index[key] = self.rows
+            self.rows += 1
+        self.counters["appended"] += len(new)
+
+    def encode(self, texts, encode_fn):
+        """
+        Cached encode: returns a float32 array with one row per text, calling
+        encode_fn (list[str] -> 2D array) only for texts not in the cache.
+        """
+        cached = self.get_many(texts)
+        missing = [i for i, v in enumerate(cached) if v is None]
+        if missing:
+            # Encode each distinct missing text once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            fresh = np.asarray(encode_fn(unique), dtype=np.float32)
+            self.put_many(unique, fresh)
+            by_text = dict(zip(unique, fresh))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+        return np.stack(cached) if cached else np.empty((0, self.dim), dtype=np.float32)
+
+    def compact(self, keep_texts=None, keep_keys=None):
+        """
+        Rewrites the cache without duplicate rows and, when keep_texts / keep_keys
+        are given, without rows for any other text.
+        """
+        keep = None
+        if keep_texts is not None or keep_keys is not None:
+            keep = set(keep_keys or ()) | {text_key(t) for t in keep_texts or ()}
+        live = [(k, r) for k, r in self.index.items() if keep is None or k in keep]
+        live.sort(key=lambda item: item[1])
+
+        vectors = self._vectors()
+        tmp_vectors = self.vectors_path.with_suffix(".tmp")
+        tmp_keys = self.keys_path.with_suffix(".tmp")
+        with open(tmp_vectors, "wb") as vf, open(tmp_keys, "wb") as kf:
+            for start in range(0, len(live), 4096):
+                block = live[start:start + 4096]
+                vf.write(np.ascontiguousarray(vectors[[r for _, r in block]]).tobytes())
+                kf.write(b"".join(k for k, _ in block))
+
+        self._memmap = None
+        before = self.rows
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
+        self._load_index()
+        return before, self.rows
+
+    def stats(self):
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        return {
+            "model": self.model_name,
+            "entries": len(self.index),
+            "rows": self.rows,
+            "dtype": self.dtype.name,
+            "bytes": size,
+            **self.counters
+        }
+
+
+def open_existing(root=CACHE_DIR):
+    for meta_path in sorted(Path(root).glob("*/meta.json")):
+        meta = json.loads(meta_path.read_text())
+        yield EmbeddingStore(meta["model"], meta["dim"], root=root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the on-disk embedding cache.")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--model", help="Only this cache (default: all)")
+    parser.add_argument("--keep-unreferenced", action="store_true",
+                        help="compact: only drop duplicate rows, keep texts no ingest manifest references")
+    args = parser.parse_args()
+
+    keep_keys = None
+    if args.command == "compact" and not args.keep_unreferenced:
+        keep_keys = manifest_keys()
+        if keep_keys is None:
+            print("⚠ No ingest manifest found — only duplicate rows are dropped.")
+
+    for store in open_existing():
+        if args.model and store.model_name != args.model:
+            continue
+        if args.command == "compact":
+            before, after = store.compact(keep_keys=keep_keys)
+            print(f"✔ {store.model_name}: {before} → {after} rows")
+        else:
+            print(json.dumps(store.stats()))
+
+
+if __name__ == "__main__":
+    main()
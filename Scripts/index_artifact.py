@@ -0,0 +1,258 @@
+"""
+Export / restore of the vector collection as one versioned artifact.
+
+The artifact is a gzip tarball with:
+    manifest.json    format version, collection, vector config, embedding model, count, created_at
+    ids.json         point IDs
+    vectors.npy      (count, dim) float32 vectors
+    payloads.jsonl   one JSON payload per point
+    topics.json      quiz topic catalog (optional, see topic_catalog.py)
+
+Deployments that start against an empty Qdrant (or none at all) restore it
+instead of running the ingestion pipeline:
+
+    python Scripts/index_artifact.py export
+    python Scripts/index_artifact.py restore [--target qdrant|local] [--if-missing]
+
+unified_app calls ensure_collection() / ensure_local_index() at startup,
+so an artifact baked into the image is restored automatically.
+
+A Qdrant restore is atomic: points go into a temporary collection
+<name>_restore_<timestamp>, which is only exposed under <name> (as an alias)
+once its point count matches the manifest. A restore that crashes or times
+out halfway therefore never looks like a present collection; its leftover
+temporary collection is dropped by the next restore.
+"""
+
+import argparse
+import io
+import json
+import os
+import tarfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from local_index import LOCAL_INDEX_DIR, write_snapshot, scroll_points
+from topic_catalog import TOPIC_CATALOG, load_catalog, save_catalog
+
+FORMAT_VERSION = 1
+COLLECTION_NAME = "network_security_docs"
+EMBED_MODEL = "all-MiniLM-L6-v2"
+INDEX_ARTIFACT = Path(os.getenv(
+    "INDEX_ARTIFACT",
+    str(Path(__file__).parent.parent / "index_artifacts" / f"{COLLECTION_NAME}.tar.gz")
+))
+RESTORE_BATCH = 512
+RESTORE_SUFFIX = "_restore_"
+
+
+def _add_bytes(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def export_artifact(client, collection_name=COLLECTION_NAME, path=INDEX_ARTIFACT, model=EMBED_MODEL):
+    """Writes every point of the collection (vectors + payloads + config) to one artifact."""
+    vectors_config = client.get_collection(collection_name).config.params.vectors
+    ids, vectors, payload_lines = [], [], []
+    for pid, vector, payload in scroll_points(client, collection_name):
+        ids.append(pid)
+        vectors.append(np.asarray(vector, dtype=np.float32))
+        payload_lines.append(json.dumps(payload, ensure_ascii=False))
+
+    matrix = np.stack(vectors) if vectors else np.empty((0, vectors_config.size), dtype=np.float32)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "collection": collection_name,
+        "vectors": {"size": vectors_config.size, "distance": str(vectors_config.distance.value)},
+        "embedding_model": model,
+        "count": len(ids),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+    catalog = load_catalog()
+    if catalog and catalog.get("collection") != collection_name:
+        catalog = None
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    buffer = io.BytesIO()
+    np.save(buffer, matrix)
+    with tarfile.open(tmp, "w:gz") as tar:
+        _add_bytes(tar, "manifest.json", json.dumps(manifest, indent=1).encode())
+        _add_bytes(tar, "ids.json", json.dumps(ids).encode())
+        _add_bytes(tar, "vectors.npy", buffer.getvalue())
+        _add_bytes(tar, "payloads.jsonl", ("\n".join(payload_lines) + "\n").encode("utf-8") if payload_lines else b"")
+        if catalog:
+            _add_bytes(tar, "topics.json", json.dumps(catalog, ensure_ascii=False).encode("utf-8"))
+    os.replace(tmp, path)
+    return manifest
+
+
+def read_artifact(path=INDEX_ARTIFACT):
+    """Returns (manifest, ids, vectors, payloads); manifest["topic_catalog"] holds topics.json if present."""
+    with tarfile.open(path, "r:gz") as tar:
+        files = {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+
+    manifest = json.loads(files["manifest.json"])
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')}")
+    ids = json.loads(files["ids.json"])
+    vectors = np.load(io.BytesIO(files["vectors.npy"]))
+    payloads = [json.loads(line) for line in files["payloads.jsonl"].decode("utf-8").splitlines() if line]
+    manifest["topic_catalog"] = json.loads(files["topics.json"]) if "topics.json" in files else None
+    return manifest, ids, vectors, payloads
+
+
+def _restore_catalog(manifest):
+    """Writes the artifact's topic catalog unless the deployment already has one."""
+    if manifest.get("topic_catalog") and not TOPIC_CATALOG.exists():
+        save_catalog(manifest["topic_catalog"])
+
+
+def collection_present(client, collection_name):
+    """True if the name is a collection or an alias (restored collections are aliases)."""
+    if collection_name in {c.name for c in client.get_collections().collections}:
+        return True
+    return collection_name in {a.alias_name for a in client.get_aliases().aliases}
+
+
+def _drop_unfinished_restores(client, collection_name):
+    """Deletes temporary restore collections that never got the alias (crashed restores)."""
+    aliased = {a.collection_name for a in client.get_aliases().aliases}
+    for c in client.get_collections().collections:
+        if c.name.startswith(collection_name + RESTORE_SUFFIX) and c.name not in aliased:
+            client.delete_collection(c.name)
+
+
+def restore_to_qdrant(client, path=INDEX_ARTIFACT, collection_name=None):
+    from qdrant_client.http.models import (
+        CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, Distance, PayloadSchemaType, PointStruct
+    )
+    from qdrant_profiles import collection_kwargs
+
+    manifest, ids, vectors, payloads = read_artifact(path)
+    collection_name = collection_name or manifest["collection"]
+    if collection_name in {c.name for c in client.get_collections().collections}:
+        raise ValueError(f"'{collection_name}' is an existing collection; delete it first to restore")
+    _drop_unfinished_restores(client, collection_name)
+
+    target = f"{collection_name}{RESTORE_SUFFIX}{int(time.time())}"
+    # Recreated with the deployment's QDRANT_PROFILE (quantization / HNSW / on-disk settings)
+    client.create_collection(
+        collection_name=target,
+        **collection_kwargs(manifest["vectors"]["size"], distance=Distance(manifest["vectors"]["distance"]))
+    )
+    for start in range(0, len(ids), RESTORE_BATCH):
+        client.upsert(
+            collection_name=target,
+            points=[
+                PointStruct(id=pid, vector=vector.tolist(), payload=payload)
+                for pid, vector, payload in zip(
+                    ids[start:start + RESTORE_BATCH],
+                    vectors[start:start + RESTORE_BATCH],
+                    payloads[start:start + RESTORE_BATCH]
+                )
+            ],
+            wait=True
+        )
+    # Quiz topic filters (build_catalog creates the same index after ingestion)
+    if any("topic_id" in payload for payload in payloads):
+        client.create_payload_index(target, "topic_id", field_schema=PayloadSchemaType.INTEGER)
+
+    restored = client.count(target, exact=True).count
+    if restored != manifest["count"]:
+        client.delete_collection(target)
+        raise RuntimeError(f"Restore incomplete: {restored} of {manifest['count']} points in '{target}'")
+
+    # Point the name at the new collection in one step, then drop the one it replaced
+    previous = [a.collection_name for a in client.get_aliases().aliases if a.alias_name == collection_name]
+    operations = [DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=collection_name))] if previous else []
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=collection_name)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    for old in previous:
+        client.delete_collection(old)
+
+    _restore_catalog(manifest)
+    return manifest
+
+
+def restore_to_local_index(path=INDEX_ARTIFACT, directory=LOCAL_INDEX_DIR, int8=False):
+    manifest, ids, vectors, payloads = read_artifact(path)
+    write_snapshot(directory, zip(ids, vectors, payloads), manifest["collection"], int8=int8)
+    _restore_catalog(manifest)
+    return manifest
+
+
+def _check_model(manifest, model):
+    if manifest.get("embedding_model") != model:
+        print(f"   [WARN] Artifact was built with '{manifest.get('embedding_model')}', app uses '{model}'.")
+
+
+# =============================================
+# Startup hooks
+# =============================================
+def ensure_collection(client, collection_name=COLLECTION_NAME, path=INDEX_ARTIFACT, model=EMBED_MODEL):
+    """Restores the artifact into Qdrant if the collection is missing. Returns True if restored."""
+    if collection_present(client, collection_name) or not Path(path).exists():
+        return False
+
+    started = time.perf_counter()
+    print(f"   Collection '{collection_name}' missing — restoring from {path}...")
+    manifest = restore_to_qdrant(client, path, collection_name)
+    _check_model(manifest, model)
+    print(f"   [OK] Restored {manifest['count']} points in {time.perf_counter() - started:.1f}s.")
+    return True
+
+
+def ensure_local_index(directory=LOCAL_INDEX_DIR, path=INDEX_ARTIFACT, model=EMBED_MODEL):
+    """Builds the local index snapshot from the artifact if it does not exist yet."""
+    if (Path(directory) / "meta.json").exists() or not Path(path).exists():
+        return False
+
+    print(f"   Building local index from {path}...")
+    manifest = restore_to_local_index(path, directory)
+    _check_model(manifest, model)
+    print(f"   [OK] Local index built with {manifest['count']} points.")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / restore the vector collection artifact.")
+    parser.add_argument("command", choices=["export", "restore"])
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--artifact", default=str(INDEX_ARTIFACT))
+    parser.add_argument("--target", choices=["qdrant", "local"], default="qdrant")
+    parser.add_argument("--if-missing", action="store_true", help="Only restore when the target is empty")
+    args = parser.parse_args()
+
+    if args.command == "restore" and args.target == "local":
+        if args.if_missing:
+            ensure_local_index(path=args.artifact)
+        else:
+            manifest = restore_to_local_index(args.artifact)
+            print(f"✔ Local index built with {manifest['count']} points.")
+        return
+
+    from qdrant_client import QdrantClient
+    client = QdrantClient(host=args.host, port=args.port)
+
+    if args.command == "export":
+        manifest = export_artifact(client, args.collection, args.artifact)
+        print(f"✔ Exported {manifest['count']} points from '{args.collection}' to {args.artifact}")
+    elif args.if_missing:
+        if not ensure_collection(client, args.collection, args.artifact):
+            print(f"✔ Nothing to restore ('{args.collection}' exists or no artifact).")
+    else:
+        manifest = restore_to_qdrant(client, args.artifact, args.collection)
+        print(f"✔ Restored {manifest['count']} points into '{args.collection}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Ingestion manifest for incremental, idempotent re-indexing.
+
+The manifest records, per PDF, its size/mtime and a content hash, and per
+page the page-text hash, the chunk hashes and the point IDs written for it.
+Point IDs are UUIDv5s derived from (document, page, chunk index, chunk hash),
+so re-ingesting unchanged content overwrites the same points instead of
+duplicating them. On a re-run only new or changed pages are embedded, and
+the IDs of changed or deleted content are returned for removal.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+POINT_NAMESPACE = uuid.UUID("6f1c9a52-4d0e-5b8a-9c3e-2a7d1f0b8e41")
+
+
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def point_id(document, page_number, chunk_index, chunk_hash):
+    """Deterministic point ID for one chunk of content."""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{document}|{page_number}|{chunk_index}|{chunk_hash}"))
+
+
+class IngestManifest:
+    def __init__(self, path, settings):
+        # settings: everything that changes the vectors (model, chunking); a change forces a rebuild
+        self.path = Path(path)
+        self.settings = settings
+        self.files = {}
+        # Point IDs written under different settings; delete them on a rebuild
+        self.orphaned_ids = []
+        # File name -> sha256 computed by file_changed() during this run
+        self.file_digests = {}
+
+    @classmethod
+    def load(cls, path, settings):
+        manifest = cls(path, settings)
+        try:
+            data = json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != settings:
+            print("⚠ Ingestion settings changed since the last run — full rebuild.")
+            manifest.orphaned_ids = [
+                pid
+                for entry in data.get("files", {}).values()
+                for page in entry.get("pages", {}).values()
+                for pid in page.get("point_ids", [])
+            ]
+            return manifest
+
+        manifest.files = data.get("files", {})
+        return manifest
+
+    def reset(self):
+        """Forget everything (e.g. the collection was recreated)."""
+        self.files = {}
+        self.orphaned_ids = []
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "files": self.files
+        }, indent=1))
+        os.replace(tmp, self.path)
+
+    # ---------- files ----------
+    def file_changed(self, path):
+        """
+        Cheap check first (size + mtime), then content hash. Returns False when
+        the file can be skipped without extracting it.
+        """
+        path = Path(path)
+        entry = self.files.get(path.name)
+        if entry is None:
+            return True
+
+        stat = path.stat()
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return False
+
+        digest = self.file_digests[path.name] = sha256_file(path)
+        if entry.get("sha256") == digest:
+            entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+            return False
+        return True
+
+    def begin_file(self, path, sha256=None):
+        """Starts (re)recording a file; returns its previous page records. Pass `sha256` if already known."""
+        path = Path(path)
+        stat = path.stat()
+        previous = self.files.get(path.name, {}).get("pages", {})
+        self.files[path.name] = {
+            "sha256": sha256 or self.file_digests.get(path.name) or sha256_file(path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "pages": {}
+        }
+        return previous
+
+    def deleted_files(self, present_names):
+        """Drops files no longer on disk; returns the point IDs to delete."""
+        stale = []
+        for name in list(self.files):
+            if name not in present_names:
+                for page in self.files.pop(name)["pages"].values():
+                    stale.extend(page["point_ids"])
+        return stale
+
+    # ---------- pages ----------
+    @staticmethod
+    def page_unchanged(previous, page_number, page_hash):
+        entry = previous.get(str(page_number))
+        return entry is not None and entry["sha256"] == page_hash
+
+    def record_page(self, document, page_number, page_hash, chunk_hashes, point_ids):
+        self.files[document]["pages"][str(page_number)] = {
+            "sha256": page_hash,
+            "chunks": chunk_hashes,
+            "point_ids": point_ids
+        }
+
+    def keep_page(self, document, page_number, previous):
+        self.files[document]["pages"][str(page_number)] = previous[str(page_number)]
+
+    def unreferenced(self, ids):
+        """
+        The given IDs minus every ID the manifest currently records (deduplicated).
+        Unchanged chunks keep their ID across a settings rebuild, so orphaned IDs
+        that were just re-written must not be deleted.
+        """
+        live = {pid for entry in self.files.values() for page in entry["pages"].values() for pid in page["point_ids"]}
+        return [pid for pid in dict.fromkeys(ids) if pid not in live]
+
+    @staticmethod
+    def stale_ids(previous, current_pages):
+        """IDs from the previous page records that are not part of the new ones."""
+        current = {pid for page in current_pages.values() for pid in page["point_ids"]}
+        return [
+            pid
+            for page in previous.values()
+            for pid in page["point_ids"]
+            if pid not in current
+        ]
@@ -0,0 +1,36 @@
+"""
+Reacting to re-ingestion.
+
+Data_insertion_qdrant.py rewrites the .ingest_version marker after every run
+that changed the collection. In-memory components derived from the
+collection (answer cache, passage cache, topic catalog) mix in VersionSynced
+and call sync_version(read_ingest_version(...)) before use; the first call
+only records the version, every later change triggers on_version_change().
+"""
+
+from pathlib import Path
+
+INGEST_MARKER = Path(__file__).parent.parent / ".ingest_version"
+
+
+def read_ingest_version(marker=INGEST_MARKER):
+    """Changes whenever the collection is re-ingested (None before the first ingestion)."""
+    try:
+        return Path(marker).stat().st_mtime
+    except OSError:
+        return None
+
+
+class VersionSynced:
+    # read_ingest_version() returns None before the first ingestion, so None can't mean "never synced"
+    _UNSYNCED = object()
+    version = _UNSYNCED
+
+    def sync_version(self, version):
+        if version != self.version:
+            if self.version is not self._UNSYNCED:
+                self.on_version_change()
+            self.version = version
+
+    def on_version_change(self):
+        raise NotImplementedError
@@ -1,19 +1,21 @@
 # scripts/init_qdrant.py
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+
+from qdrant_profiles import collection_kwargs, get_profile
 
 def initialize_qdrant():
     # Connect to Qdrant
     qdrant_client = QdrantClient(host="localhost", port=6333)
 
-    # Define and create a collection with vector configuration
+    # Define and create a collection with the configured performance profile (QDRANT_PROFILE)
+    profile, _ = get_profile()
     qdrant_client.recreate_collection(
         collection_name="network_security_docs",
-        vectors_config=VectorParams(size=384, distance=Distance.COSINE)
+        **collection_kwargs(384, profile)
     )
 
-    print("Qdrant collection 'network_security_knowledge' initialized successfully.")
+    print(f"Qdrant collection 'network_security_docs' initialized successfully (profile: {profile}).")
 
 if __name__ == "__main__":
     initialize_qdrant()
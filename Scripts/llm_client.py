@@ -0,0 +1,236 @@
+"""
+Shared async client for the LM Studio (OpenAI-compatible) chat completions API.
+
+One pooled httpx.AsyncClient is reused by every caller, so chat, quiz
+generation and grading share keep-alive connections instead of opening a
+new TCP connection per request. Each call has its own timeout and is retried
+with jittered exponential backoff on transport errors, 429 and 5xx replies.
+
+Calls may pass an OpenAI-style `response_format` (JSON schema). If the
+backend rejects it (a 400/422 whose error mentions response_format or
+json_schema), that request is re-sent once without it; other 400/422 errors
+are raised as usual. structured_output=False never sends it.
+
+Streamed requests ask for a final usage chunk (`stream_options:
+{"include_usage": true}`) so their tokens are counted like non-streamed
+ones; a backend refusing the option gets the request again without it.
+"""
+
+import asyncio
+import json
+import random
+
+import httpx
+
+# Status codes worth retrying (rate limited / server side failures)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Replies of backends that do not understand an optional request field ...
+UNSUPPORTED_FORMAT_STATUS = {400, 422}
+# ... recognised by the error body naming the field
+UNSUPPORTED_FORMAT_MARKERS = ("response_format", "json_schema")
+UNSUPPORTED_STREAM_OPTIONS_MARKERS = ("stream_options", "include_usage")
+
+
+class LLMError(Exception):
+    """Raised when the LLM backend cannot produce a completion."""
+
+
+class LLMClient:
+    def __init__(self, url, model, timeout=30.0, max_retries=2, backoff=0.5,
+                 max_connections=20, max_keepalive=10, structured_output=True):
+        self.url = url
+        self.model = model
+        self.structured_output = structured_output
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive
+        )
+        self._client = None
+        self.usage = {
+            "requests": 0,
+            "failures": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "structured_output_fallbacks": 0,
+            "stream_usage_fallbacks": 0
+        }
+
+    def _get_client(self):
+        """Lazily creates the pooled client inside the running event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    @staticmethod
+    def build_messages(system_prompt, user_prompt):
+        if system_prompt:
+            return [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        return [{"role": "user", "content": user_prompt}]
+
+    def _record_usage(self, usage):
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            self.usage[key] += int((usage or {}).get(key) or 0)
+
+    def _build_payload(self, messages, temperature, max_tokens, stream, extra):
+        if not self.structured_output:
+            extra.pop("response_format", None)
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+            **extra
+        }
+        if stream:
+            payload.setdefault("stream_options", {"include_usage": True})
+        return payload
+
+    def _drop_unsupported(self, payload, field, markers, counter, status_code, body):
+        """True if the backend refused this request's `field` (it is removed from the payload)."""
+        if status_code not in UNSUPPORTED_FORMAT_STATUS or field not in payload:
+            return False
+        if not any(marker in body for marker in markers):
+            return False
+        del payload[field]
+        self.usage[counter] += 1
+        print(f"[WARN] LLM backend rejected {field} (HTTP {status_code}); retrying without it.")
+        return True
+
+    def _drop_response_format(self, payload, status_code, body):
+        return self._drop_unsupported(payload, "response_format", UNSUPPORTED_FORMAT_MARKERS,
+                                      "structured_output_fallbacks", status_code, body)
+
+    def _drop_stream_options(self, payload, status_code, body):
+        return self._drop_unsupported(payload, "stream_options", UNSUPPORTED_STREAM_OPTIONS_MARKERS,
+                                      "stream_usage_fallbacks", status_code, body)
+
+    async def _sleep_before_retry(self, attempt):
+        # Full jitter: spreads retries from concurrent callers apart
+        self.usage["retries"] += 1
+        await asyncio.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+    async def complete(self, messages, temperature=0.1, max_tokens=400, timeout=None, **extra):
+        """
+        Sends one chat completion and returns (content, usage).
+        Raises LLMError once all retries are exhausted.
+        """
+        payload = self._build_payload(messages, temperature, max_tokens, False, extra)
+        client = self._get_client()
+        self.usage["requests"] += 1
+        last_error = None
+
+        attempt = 0
+        while attempt <= self.max_retries:
+            try:
+                response = await client.post(
+                    self.url,
+                    json=payload,
+                    timeout=timeout if timeout is not None else self.timeout
+                )
+                # Schema refused: resend without it (not counted as a retry)
+                if self._drop_response_format(payload, response.status_code, response.text):
+                    continue
+                if response.status_code in RETRYABLE_STATUS:
+                    last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                elif response.status_code != 200:
+                    self.usage["failures"] += 1
+                    raise LLMError(f"HTTP {response.status_code}: {response.text[:200]}")
+                else:
+                    data = response.json()
+                    usage = data.get("usage") or {}
+                    self._record_usage(usage)
+                    return data["choices"][0]["message"]["content"], usage
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                last_error = f"{type(e).__name__}: {e}"
+            except (KeyError, IndexError, ValueError) as e:
+                self.usage["failures"] += 1
+                raise LLMError(f"Malformed LLM response: {e}") from e
+
+            if attempt < self.max_retries:
+                await self._sleep_before_retry(attempt)
+            attempt += 1
+
+        self.usage["failures"] += 1
+        raise LLMError(last_error or "LLM request failed")
+
+    async def stream(self, messages, temperature=0.1, max_tokens=400, timeout=None, **extra):
+        """
+        Streams a chat completion, yielding content deltas as they arrive.
+        Connection failures are retried only until the first token is sent.
+        """
+        payload = self._build_payload(messages, temperature, max_tokens, True, extra)
+        client = self._get_client()
+        self.usage["requests"] += 1
+        last_error = None
+
+        attempt = 0
+        while attempt <= self.max_retries:
+            started = False
+            try:
+                async with client.stream(
+                    "POST",
+                    self.url,
+                    json=payload,
+                    timeout=timeout if timeout is not None else self.timeout
+                ) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode(errors="replace")
+                        last_error = f"HTTP {response.status_code}: {body[:200]}"
+                        if (self._drop_stream_options(payload, response.status_code, body)
+                                or self._drop_response_format(payload, response.status_code, body)):
+                            continue
+                        if response.status_code not in RETRYABLE_STATUS:
+                            break
+                    else:
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                chunk = json.loads(data)
+                            except ValueError:
+                                continue
+                            if chunk.get("usage"):
+                                self._record_usage(chunk["usage"])
+                            for choice in chunk.get("choices") or []:
+                                token = (choice.get("delta") or {}).get("content")
+                                if token:
+                                    started = True
+                                    yield token
+                        return
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if started:
+                    self.usage["failures"] += 1
+                    raise LLMError(f"Stream interrupted: {e}") from e
+                last_error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                await self._sleep_before_retry(attempt)
+            attempt += 1
+
+        self.usage["failures"] += 1
+        raise LLMError(last_error or "LLM stream failed")
+
+    async def generate(self, system_prompt, user_prompt, **kwargs):
+        """Convenience wrapper returning only the completion text."""
+        content, _ = await self.complete(self.build_messages(system_prompt, user_prompt), **kwargs)
+        return content
+
+    def stats(self):
+        return dict(self.usage)
@@ -0,0 +1,190 @@
+"""
+Embedded NumPy vector index used when no Qdrant server is reachable.
+
+A snapshot directory holds:
+    meta.json        collection, dimension, count, dtype
+    vectors.npy      (count, dim) L2-normalised float32, or int8 when quantized
+    scales.npy       per-row dequantisation scale (int8 snapshots only)
+    payloads.jsonl   one JSON payload per point
+    offsets.npy      (count + 1) byte offsets of each payload line
+    ids.json         original point IDs, row-aligned
+
+Vectors and payloads are memory-mapped, so loading is instant and only the
+pages touched by a search are read. Search is a single matrix-vector product
+plus argpartition for the top-k; with int8 vectors the matrix is 4x smaller.
+
+    python Scripts/local_index.py build [--int8]   # snapshot from running Qdrant
+"""
+
+import argparse
+import json
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+LOCAL_INDEX_DIR = Path(os.getenv("LOCAL_INDEX_DIR", str(Path(__file__).parent.parent / "index_snapshot")))
+SCORE_BLOCK = 65536
+
+
+class LocalHit:
+    """Mirrors the attributes of a Qdrant ScoredPoint that callers use."""
+
+    __slots__ = ("id", "score", "payload")
+
+    def __init__(self, id, score, payload):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+
+class LocalIndex:
+    def __init__(self, directory):
+        directory = Path(directory)
+        self.meta = json.loads((directory / "meta.json").read_text())
+        self.vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        self.scales = np.load(directory / "scales.npy", mmap_mode="r") if self.meta.get("dtype") == "int8" else None
+        self.offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+        self.ids = json.loads((directory / "ids.json").read_text()) if (directory / "ids.json").exists() else None
+        self._payload_file = open(directory / "payloads.jsonl", "rb")
+        self._payloads = mmap.mmap(self._payload_file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.path.getsize(directory / "payloads.jsonl") else b""
+
+    @classmethod
+    def load(cls, directory=LOCAL_INDEX_DIR):
+        """Returns the index, or None when no usable snapshot exists."""
+        try:
+            return cls(directory)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   [WARN] No local index at {directory}: {e}")
+            return None
+
+    def __len__(self):
+        return int(self.vectors.shape[0])
+
+    def payload(self, row):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._payloads[start:end])
+
+    def scores(self, query):
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        if self.scales is None:
+            return self.vectors @ query
+        # int8 rows: dot in float32 block by block (bounded temporaries),
+        # then undo the per-row scale
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK):
+            block = np.asarray(self.vectors[start:start + SCORE_BLOCK], dtype=np.float32)
+            scores[start:start + SCORE_BLOCK] = block @ query
+        return scores * self.scales
+
+    def search(self, query, limit=10, score_threshold=None, fields=None):
+        """
+        Top-k cosine search; returns LocalHit objects sorted by score. Payloads
+        are only decoded for hits above the threshold, and reduced to `fields`
+        when given.
+        """
+        if not len(self):
+            return []
+        scores = self.scores(query)
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        hits = []
+        for row in top:
+            score = float(scores[row])
+            if score_threshold is not None and score < score_threshold:
+                break
+            point_id = self.ids[row] if self.ids else int(row)
+            payload = self.payload(int(row))
+            if fields:
+                payload = {k: payload[k] for k in fields if k in payload}
+            hits.append(LocalHit(point_id, score, payload))
+        return hits
+
+
+# =============================================
+# Snapshot writer
+# =============================================
+def write_snapshot(directory, points, collection_name, int8=False):
+    """
+    points: iterable of (id, vector, payload). Vectors are L2-normalised so
+    dot product equals cosine similarity, matching the Cosine collection.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    ids, vectors, offsets = [], [], [0]
+    with open(directory / "payloads.jsonl", "wb") as pf:
+        for pid, vector, payload in points:
+            line = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+            pf.write(line)
+            offsets.append(offsets[-1] + len(line))
+            ids.append(pid)
+            vectors.append(np.asarray(vector, dtype=np.float32))
+
+    matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    if len(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+    if int8:
+        peak = np.abs(matrix).max(axis=1) if len(matrix) else np.empty(0, dtype=np.float32)
+        peak[peak == 0] = 1.0
+        quantized = np.round(matrix / peak[:, None] * 127).astype(np.int8)
+        np.save(directory / "vectors.npy", quantized)
+        np.save(directory / "scales.npy", (peak / 127).astype(np.float32))
+    else:
+        np.save(directory / "vectors.npy", matrix.astype(np.float32))
+
+    np.save(directory / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    (directory / "ids.json").write_text(json.dumps([str(i) for i in ids]))
+    (directory / "meta.json").write_text(json.dumps({
+        "collection": collection_name,
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if len(matrix) else 0,
+        "dtype": "int8" if int8 else "float32"
+    }))
+    return len(ids)
+
+
+def scroll_points(client, collection_name, batch=512, with_vectors=True, with_payload=True, scroll_filter=None):
+    """Yields (id, vector, payload) for every point (matching the filter) in a Qdrant collection."""
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=batch,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=with_vectors
+        )
+        for record in records:
+            yield record.id, record.vector, record.payload or {}
+        if offset is None:
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local fallback index from Qdrant.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default="network_security_docs")
+    parser.add_argument("--output", default=str(LOCAL_INDEX_DIR))
+    parser.add_argument("--int8", action="store_true", help="Store int8-quantized vectors")
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    client = QdrantClient(host=args.host, port=args.port)
+    count = write_snapshot(args.output, scroll_points(client, args.collection), args.collection, int8=args.int8)
+    print(f"✔ Wrote {count} points from '{args.collection}' to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
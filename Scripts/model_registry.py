@@ -0,0 +1,78 @@
+"""
+Lazy, shared registry for embedding models.
+
+Models are loaded on first use (or by a background warmup task) and one
+instance is shared per model name, so importing the app no longer pays for
+models that are not needed yet. status() reports which models are warm.
+"""
+
+import asyncio
+import threading
+import time
+
+from embedding_backends import load_encoder
+
+
+class ModelRegistry:
+    def __init__(self, loader=load_encoder):
+        self.loader = loader
+        self._models = {}
+        self._status = {}
+        self._errors = {}
+        self._load_seconds = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def _lock_for(self, name):
+        with self._registry_lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Returns the shared instance for `name`, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock_for(name):
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+
+            self._status[name] = "loading"
+            print(f"   Loading model '{name}'...")
+            started = time.perf_counter()
+            try:
+                model = self.loader(name)
+            except Exception as e:
+                self._status[name] = "error"
+                self._errors[name] = str(e)
+                raise
+            self._load_seconds[name] = round(time.perf_counter() - started, 2)
+            self._models[name] = model
+            self._status[name] = "warm"
+            self._errors.pop(name, None)
+            backend = getattr(model, "embed_backend", "torch")
+            print(f"   [OK] Model '{name}' ({backend}) loaded in {self._load_seconds[name]}s.")
+            return model
+
+    async def warmup(self, names):
+        """Loads the given models in worker threads without blocking the event loop."""
+        for name in names:
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception as e:
+                print(f"   [WARN] Warmup failed for '{name}': {e}")
+
+    def is_warm(self, name):
+        return self._status.get(name) == "warm"
+
+    def status(self):
+        return {
+            name: {
+                "status": state,
+                "backend": getattr(self._models.get(name), "embed_backend", None),
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name)
+            }
+            for name, state in self._status.items()
+        }
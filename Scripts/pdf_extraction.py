@@ -0,0 +1,159 @@
+"""
+PDF page extraction used by the ingestion scripts.
+
+Kept in its own lightweight module (only the PDF libraries and the stdlib-only
+ingest_manifest helpers are imported) so worker processes of the ingestion
+process pool do not load the embedding model or open database connections.
+
+Extracted pages are cached in a gzip-compressed JSONL text corpus
+(text_corpus/<backend>/<pdf name>.jsonl.gz). The first line of each shard
+records the source file's size, mtime and sha256, and every following line
+is one {"page", "text"} record. As long as the PDF is unchanged, later runs
+read the shard instead of re-parsing the PDF, which matters whenever the
+chunking or embedding settings change and everything must be re-embedded.
+
+A PDF that fails to parse raises ExtractionError: no shard is written for
+it, so a partial or empty page list is never cached (or ingested) as the
+file's content.
+"""
+
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from ingest_manifest import sha256_file
+
+CORPUS_DIR = Path(os.getenv("TEXT_CORPUS_DIR", str(Path(__file__).parent.parent / "text_corpus")))
+
+
+class ExtractionError(Exception):
+    """The PDF could not be parsed (completely)."""
+
+
+def extract_text_pypdf(pdf_path, verbose=True):
+    """Yields (page_number, text) for every non-empty page of the PDF."""
+    pdf_path = Path(pdf_path)
+    try:
+        reader = PdfReader(pdf_path)
+        if verbose:
+            print(f"   → Total pages: {len(reader.pages)}")
+
+        for page_num, page in enumerate(reader.pages, start=1):
+            if verbose:
+                print(f"   → Extracting Page {page_num}/{len(reader.pages)} ...")
+
+            text = page.extract_text()
+
+            if not text or not text.strip():
+                if verbose:
+                    print("     ⚠ Empty page — skipped.\n")
+                continue
+
+            yield page_num, text
+
+    except Exception as e:
+        raise ExtractionError(f"pypdf could not read {pdf_path.name}: {e}") from e
+
+
+def extract_text_pdfplumber(pdf_path, verbose=False):
+    """Yields (page_number, text) using pdfplumber (used by the Chroma pipeline)."""
+    import pdfplumber
+
+    pdf_path = Path(pdf_path)
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf.pages, start=1):
+                text = page.extract_text()
+                if not text or not text.strip():
+                    continue
+                yield page_num, text
+    except Exception as e:
+        raise ExtractionError(f"pdfplumber could not read {pdf_path.name}: {e}") from e
+
+
+EXTRACTORS = {
+    "pypdf": extract_text_pypdf,
+    "pdfplumber": extract_text_pdfplumber,
+}
+
+
+# =============================================
+# Extracted-text corpus
+# =============================================
+def _file_signature(pdf_path):
+    stat = pdf_path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def shard_path(pdf_path, backend, corpus_dir=CORPUS_DIR):
+    return Path(corpus_dir) / backend / f"{Path(pdf_path).name}.jsonl.gz"
+
+
+def read_shard(path):
+    """Returns (header, [(page_number, text), ...]) or (None, None) if unreadable."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            pages = [(rec["page"], rec["text"]) for rec in map(json.loads, f)]
+        return header, pages
+    except (OSError, ValueError, KeyError, EOFError):
+        return None, None
+
+
+def write_shard(path, header, pages):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(json.dumps(header) + "\n")
+        for page_num, text in pages:
+            f.write(json.dumps({"page": page_num, "text": text}, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def load_or_extract(pdf_path, backend="pypdf", corpus_dir=CORPUS_DIR, sha256=None):
+    """
+    Returns ([(page_number, text), ...], from_corpus). Reads the corpus shard
+    when it matches the PDF (size + mtime, else sha256); otherwise extracts
+    with `backend` and rewrites the shard. Raises ExtractionError (leaving the
+    shard untouched) when the PDF cannot be parsed. Pass `sha256` when the
+    caller already hashed the file.
+    """
+    pdf_path = Path(pdf_path)
+    path = shard_path(pdf_path, backend, corpus_dir)
+    signature = _file_signature(pdf_path)
+
+    if path.exists():
+        header, pages = read_shard(path)
+        if header is not None:
+            if all(header.get(k) == v for k, v in signature.items()):
+                return pages, True
+            sha256 = sha256 or sha256_file(pdf_path)
+            if header.get("sha256") == sha256:
+                # Touched but identical: refresh the signature, keep the text
+                write_shard(path, {**header, **signature}, pages)
+                return pages, True
+
+    pages = list(EXTRACTORS[backend](pdf_path, verbose=False))
+    header = {"file": pdf_path.name, "backend": backend, "sha256": sha256 or sha256_file(pdf_path), **signature}
+    write_shard(path, header, pages)
+    return pages, False
+
+
+def extract_pdf_pages(pdf_path, backend="pypdf", sha256=None):
+    """
+    Process-pool worker: returns (file name, [(page_number, text), ...], seconds, from_corpus, sha256).
+    pages is None when the PDF could not be parsed. The file is hashed here
+    (in the worker) unless the caller already passes its sha256.
+    """
+    started = time.perf_counter()
+    sha256 = sha256 or sha256_file(pdf_path)
+    try:
+        pages, from_corpus = load_or_extract(pdf_path, backend, sha256=sha256)
+    except ExtractionError as e:
+        print(f"❌ ERROR: {e}")
+        pages, from_corpus = None, False
+    return Path(pdf_path).name, pages, time.perf_counter() - started, from_corpus, sha256
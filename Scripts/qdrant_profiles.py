@@ -0,0 +1,107 @@
+"""
+Performance profiles for the Qdrant collection.
+
+A profile bundles everything that has to agree between collection creation
+and query time: HNSW graph parameters, vector quantization, whether original
+vectors / payloads live on disk, and the search-time hnsw_ef / rescoring.
+Select one with QDRANT_PROFILE (default: "default", the plain collection).
+A None setting leaves the server default in place.
+
+    default      plain float32 vectors, server defaults for everything else
+    balanced     int8 scalar quantization in RAM, originals + payloads on disk, rescored
+    low-memory   binary quantization in RAM, originals + payloads on disk, oversampled + rescored
+    high-recall  denser HNSW graph and larger hnsw_ef, no quantization
+"""
+
+import os
+
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
+
+QDRANT_PROFILE = os.getenv("QDRANT_PROFILE", "default")
+
+PROFILES = {
+    "default": {
+        "m": None, "ef_construct": None, "quantization": None,
+        "vectors_on_disk": None, "payload_on_disk": None,
+        "hnsw_ef": None, "rescore": False, "oversampling": None
+    },
+    "balanced": {
+        "m": 16, "ef_construct": 128, "quantization": "int8",
+        "vectors_on_disk": True, "payload_on_disk": True,
+        "hnsw_ef": 64, "rescore": True, "oversampling": 2.0
+    },
+    "low-memory": {
+        "m": 16, "ef_construct": 128, "quantization": "binary",
+        "vectors_on_disk": True, "payload_on_disk": True,
+        "hnsw_ef": 128, "rescore": True, "oversampling": 3.0
+    },
+    "high-recall": {
+        "m": 32, "ef_construct": 256, "quantization": None,
+        "vectors_on_disk": None, "payload_on_disk": None,
+        "hnsw_ef": 256, "rescore": False, "oversampling": None
+    },
+}
+
+
+def get_profile(name=None):
+    name = name or QDRANT_PROFILE
+    if name not in PROFILES:
+        print(f"[WARN] Unknown QDRANT_PROFILE '{name}', using 'default'.")
+        name = "default"
+    return name, PROFILES[name]
+
+
+def collection_kwargs(dim, name=None, distance=Distance.COSINE):
+    """Keyword arguments for QdrantClient.create_collection()."""
+    _, profile = get_profile(name)
+    kwargs = {"vectors_config": VectorParams(size=dim, distance=distance, on_disk=profile["vectors_on_disk"])}
+    if profile["payload_on_disk"] is not None:
+        kwargs["on_disk_payload"] = profile["payload_on_disk"]
+    if profile["m"] is not None:
+        kwargs["hnsw_config"] = HnswConfigDiff(m=profile["m"], ef_construct=profile["ef_construct"])
+    if profile["quantization"] == "int8":
+        kwargs["quantization_config"] = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    elif profile["quantization"] == "binary":
+        kwargs["quantization_config"] = BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True)
+        )
+    return kwargs
+
+
+def search_params(name=None):
+    """SearchParams for query_points(), or None when the profile uses server defaults."""
+    _, profile = get_profile(name)
+    if profile["hnsw_ef"] is None and not profile["quantization"]:
+        return None
+    quantization = None
+    if profile["quantization"]:
+        quantization = QuantizationSearchParams(rescore=profile["rescore"], oversampling=profile["oversampling"])
+    return SearchParams(hnsw_ef=profile["hnsw_ef"], quantization=quantization)
+
+
+def estimated_ram_bytes(count, dim, name=None, payload_bytes=0):
+    """Rough resident size of vectors (+ payloads) for `count` points under a profile."""
+    _, profile = get_profile(name)
+    ram = 0 if profile["vectors_on_disk"] else count * dim * 4
+    if profile["quantization"] == "int8":
+        ram += count * dim
+    elif profile["quantization"] == "binary":
+        ram += count * dim // 8
+    if not profile["payload_on_disk"]:
+        ram += payload_bytes
+    # HNSW links: ~m * 2 neighbours on layer 0, 4-byte ids
+    ram += count * (profile["m"] or 16) * 2 * 4
+    return ram
@@ -0,0 +1,173 @@
+"""
+Persistent bank of pre-generated quiz questions (SQLite).
+
+Questions are stored per (topic, question type) pool together with the
+embedding of the question text. add() rejects a question whose embedding is
+too close to one already in the same topic (checked against an in-memory
+matrix per topic, loaded from SQLite once), draw() hands out (and removes)
+questions in milliseconds, and a background worker in the app keeps every
+pool topped up to its target depth, so /generate only falls back to live
+LLM generation when a pool has run dry. The methods block on SQLite, so the
+async app calls them through asyncio.to_thread().
+
+    python Scripts/question_bank.py stats|clear
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+QUESTION_BANK_DB = Path(os.getenv("QUESTION_BANK_DB", str(Path(__file__).parent.parent / "question_bank.sqlite3")))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    qtype TEXT NOT NULL,
+    question TEXT NOT NULL,
+    data TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_pool ON questions (topic, qtype);
+"""
+
+
+def topic_key(topic):
+    return " ".join((topic or "").lower().split())
+
+
+class QuestionBank:
+    def __init__(self, path=QUESTION_BANK_DB, dup_threshold=0.9):
+        self.path = Path(path)
+        self.dup_threshold = dup_threshold
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._vectors = {}  # topic key -> (row ids, normalised embedding matrix), loaded on first add()
+        self.counters = {"drawn": 0, "short_draws": 0, "added": 0, "duplicates": 0}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def depth(self, topic, qtype):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) FROM questions WHERE topic = ? AND qtype = ?", (topic_key(topic), qtype)
+            ).fetchone()
+        return row[0]
+
+    def pool_depths(self):
+        """{(topic, qtype): count} for every non-empty pool."""
+        with self._lock:
+            rows = self._db.execute("SELECT topic, qtype, COUNT(*) FROM questions GROUP BY topic, qtype").fetchall()
+        return {(topic, qtype): count for topic, qtype, count in rows}
+
+    def _topic_vectors(self, key, dim):
+        """(row ids, matrix) of the topic's stored embeddings; read from SQLite once per topic."""
+        if key not in self._vectors:
+            rows = self._db.execute("SELECT id, embedding FROM questions WHERE topic = ?", (key,)).fetchall()
+            matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32).reshape(len(rows), dim)
+            self._vectors[key] = ([r[0] for r in rows], matrix)
+        return self._vectors[key]
+
+    def add(self, topic, qtype, data, embedding):
+        """Stores the question unless it near-duplicates one of the topic. Returns True if stored."""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        key = topic_key(topic)
+        with self._lock:
+            ids, existing = self._topic_vectors(key, len(vector))
+            if len(ids) and float(np.max(existing @ vector)) >= self.dup_threshold:
+                self.counters["duplicates"] += 1
+                return False
+            cursor = self._db.execute(
+                "INSERT INTO questions (topic, qtype, question, data, embedding, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, qtype, data["question"], json.dumps(data, ensure_ascii=False), vector.tobytes(), time.time())
+            )
+            self._db.commit()
+            self._vectors[key] = (ids + [cursor.lastrowid], np.vstack([existing, vector[None, :]]))
+            self.counters["added"] += 1
+        return True
+
+    def draw(self, topic, count, types=None):
+        """
+        Removes and returns up to `count` questions of the topic, mixing question
+        types (a random stocked type per slot). Fewer come back when the pools run out.
+        """
+        key = topic_key(topic)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, qtype, data FROM questions WHERE topic = ? ORDER BY RANDOM()", (key,)
+            ).fetchall()
+            pools = {}
+            for row in rows:
+                if types is None or row[1] in types:
+                    pools.setdefault(row[1], []).append(row)
+
+            picked = []
+            while len(picked) < count and pools:
+                qtype = random.choice(list(pools))
+                picked.append(pools[qtype].pop())
+                if not pools[qtype]:
+                    del pools[qtype]
+
+            if picked:
+                self._db.executemany("DELETE FROM questions WHERE id = ?", [(row[0],) for row in picked])
+                self._db.commit()
+                if key in self._vectors:
+                    ids, matrix = self._vectors[key]
+                    gone = {row[0] for row in picked}
+                    keep = [i for i, rid in enumerate(ids) if rid not in gone]
+                    self._vectors[key] = ([ids[i] for i in keep], matrix[keep])
+            self.counters["drawn"] += len(picked)
+            if len(picked) < count:
+                self.counters["short_draws"] += 1
+        return [json.loads(row[2]) for row in picked]
+
+    def prune(self, keep_topics):
+        """Drops the pools of topics that are no longer in the catalog (e.g. after re-ingestion)."""
+        keep = {topic_key(t) for t in keep_topics}
+        with self._lock:
+            topics = [r[0] for r in self._db.execute("SELECT DISTINCT topic FROM questions").fetchall()]
+            stale = [t for t in topics if t not in keep]
+            self._db.executemany("DELETE FROM questions WHERE topic = ?", [(t,) for t in stale])
+            self._db.commit()
+            for t in stale:
+                self._vectors.pop(t, None)
+        return len(stale)
+
+    def stats(self):
+        depths = self.pool_depths()
+        return {**self.counters, "pools": len(depths), "questions": sum(depths.values())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the quiz question bank.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--db", default=str(QUESTION_BANK_DB))
+    args = parser.parse_args()
+
+    bank = QuestionBank(args.db)
+    if args.command == "clear":
+        removed = bank.prune([])
+        print(f"✔ Cleared {removed} topic pool(s)")
+        return
+    depths = bank.pool_depths()
+    print(f"{sum(depths.values())} question(s) in {len(depths)} pool(s)")
+    for (topic, qtype), count in sorted(depths.items()):
+        print(f"   {count:>4}  {qtype:<16} {topic}")
+
+
+if __name__ == "__main__":
+    main()
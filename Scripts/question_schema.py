@@ -0,0 +1,271 @@
+"""
+JSON schemas and a validating parser for generated quiz questions.
+
+The schemas are sent as the OpenAI-compatible `response_format` (LM Studio
+constrains decoding with them), so the model can only produce the shape of
+the requested question type. They follow the strict-mode rules (every
+property required, no additional properties, no string-length keywords), so
+strict backends accept them too. Whatever comes back still goes through
+QuestionValidator, which checks the four shapes and repairs the common
+near-misses instead of discarding the generation:
+
+    - missing / aliased "type" ("Multiple Choice", "tf", ...) or inferred from the keys
+    - true/false answers given as booleans or "yes"/"t"
+    - options prefixed with "A)", "b." ... and answers given as option letters
+    - multiple_answer correct answers given as one comma separated string
+    - key_points given as one string
+
+Its counters give the parse-failure rate of the generator.
+"""
+
+import re
+import threading
+
+_TEXT = {"type": "string"}
+_OPTIONS = {"type": "array", "items": _TEXT, "minItems": 4, "maxItems": 4}
+
+
+def _object(properties):
+    """Strict-mode object schema: all properties required, nothing else allowed."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+QUESTION_JSON_SCHEMAS = {
+    "true_false": _object({
+        "question": _TEXT,
+        "type": {"type": "string", "enum": ["true_false"]},
+        "options": {"type": "array", "items": {"type": "string", "enum": ["True", "False"]}},
+        "correct_answer": {"type": "string", "enum": ["True", "False"]},
+        "explanation": _TEXT
+    }),
+    "multiple_choice": _object({
+        "question": _TEXT,
+        "type": {"type": "string", "enum": ["multiple_choice"]},
+        "options": _OPTIONS,
+        "correct_answer": _TEXT,
+        "explanation": _TEXT
+    }),
+    "multiple_answer": _object({
+        "question": _TEXT,
+        "type": {"type": "string", "enum": ["multiple_answer"]},
+        "options": _OPTIONS,
+        "correct_answers": {"type": "array", "items": _TEXT, "minItems": 1, "maxItems": 4},
+        "explanation": _TEXT
+    }),
+    "open_ended": _object({
+        "question": _TEXT,
+        "type": {"type": "string", "enum": ["open_ended"]},
+        "model_answer": _TEXT,
+        "key_points": {"type": "array", "items": _TEXT, "minItems": 3, "maxItems": 5},
+        "explanation": _TEXT
+    }),
+}
+
+GRADE_JSON_SCHEMA = _object({
+    "score": {"type": "number", "minimum": 0, "maximum": 1},
+    "feedback": _TEXT
+})
+
+
+def json_schema_format(name, schema):
+    """OpenAI-compatible response_format for a JSON schema."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def question_response_format(qtype):
+    return json_schema_format(f"{qtype}_question", QUESTION_JSON_SCHEMAS[qtype])
+
+
+def batch_response_format(qtypes):
+    """
+    {"questions": [...]} with exactly len(qtypes) items, each one of the
+    requested shapes (questions sit one level deep in the wrapper object).
+    """
+    shapes = [QUESTION_JSON_SCHEMAS[q] for q in dict.fromkeys(qtypes)]
+    return json_schema_format("question_batch", _object({
+        "questions": {
+            "type": "array",
+            "items": shapes[0] if len(shapes) == 1 else {"anyOf": shapes},
+            "minItems": len(qtypes),
+            "maxItems": len(qtypes)
+        }
+    }))
+
+
+# =============================================
+# Validation / repair
+# =============================================
+TYPE_ALIASES = {
+    "true_false": "true_false", "truefalse": "true_false", "true_or_false": "true_false", "tf": "true_false",
+    "boolean": "true_false",
+    "multiple_choice": "multiple_choice", "mcq": "multiple_choice", "single_choice": "multiple_choice",
+    "multiple_answer": "multiple_answer", "multiple_answers": "multiple_answer", "multi_answer": "multiple_answer",
+    "multiple_select": "multiple_answer", "multi_select": "multiple_answer",
+    "open_ended": "open_ended", "open": "open_ended", "short_answer": "open_ended", "essay": "open_ended",
+}
+OPTION_PREFIX = re.compile(r"^\s*(?:\(?[A-Da-d][\).:]|[1-4][\).:])\s+")
+LETTER_ANSWER = re.compile(r"^\s*\(?([A-Da-d])\)?[\).:]?\s*$")
+TRUE_WORDS = {"true", "t", "yes", "correct"}
+FALSE_WORDS = {"false", "f", "no", "incorrect"}
+
+
+def _text(value):
+    return " ".join(str(value).split()) if isinstance(value, (str, int, float)) else ""
+
+
+def _normalise_type(value):
+    key = re.sub(r"[\s/\-]+", "_", str(value or "").strip().lower())
+    return TYPE_ALIASES.get(key)
+
+
+def _infer_type(data):
+    if "correct_answers" in data:
+        return "multiple_answer"
+    if "model_answer" in data or "key_points" in data:
+        return "open_ended"
+    options = [o.lower() for o in data.get("options") or [] if isinstance(o, str)]
+    if options == ["true", "false"] or str(data.get("correct_answer", "")).lower() in TRUE_WORDS | FALSE_WORDS:
+        return "true_false"
+    if "options" in data:
+        return "multiple_choice"
+    return None
+
+
+def _match_option(answer, options):
+    """Maps an answer (text, letter or prefixed text) onto the option text, or None."""
+    for candidate in (answer.lower(), OPTION_PREFIX.sub("", answer).lower()):
+        for option in options:
+            if option.lower() == candidate:
+                return option
+    letter = LETTER_ANSWER.match(answer)
+    if letter:
+        index = ord(letter.group(1).upper()) - ord("A")
+        return options[index] if index < len(options) else None
+    return None
+
+
+class QuestionValidator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "outputs": 0,          # LLM outputs / array elements expected to hold a question
+            "parse_failures": 0,   # no JSON object could be parsed
+            "invalid": 0,          # parsed, but not a usable question even after repair
+            "repaired": 0,         # usable only after repair
+            "valid": 0
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def parse_failed(self, n=1):
+        self._count("outputs", n)
+        self._count("parse_failures", n)
+
+    def validate(self, data, expected_type=None):
+        """Returns the (repaired) question, or None when it is unusable."""
+        self._count("outputs")
+        if not isinstance(data, dict):
+            self._count("invalid")
+            return None
+        question, repaired = self._repair(dict(data), expected_type)
+        if question is None:
+            self._count("invalid")
+            return None
+        self._count("repaired" if repaired else "valid")
+        return question
+
+    def _repair(self, data, expected_type):
+        repaired = False
+        qtype = _normalise_type(data.get("type"))
+        if qtype is None:
+            qtype = _infer_type(data) or expected_type
+            repaired = True
+        elif qtype != data.get("type"):
+            repaired = True
+        if qtype is None:
+            return None, repaired
+
+        text = _text(data.get("question") or data.get("question_text"))
+        if not text:
+            return None, repaired
+        explanation = _text(data.get("explanation"))
+        question = {"question": text, "type": qtype, "explanation": explanation}
+
+        if qtype == "true_false":
+            answer = data.get("correct_answer")
+            answer = str(answer).strip().lower() if answer is not None else ""
+            if answer in TRUE_WORDS:
+                question["correct_answer"] = "True"
+            elif answer in FALSE_WORDS:
+                question["correct_answer"] = "False"
+            else:
+                return None, repaired
+            repaired |= data.get("correct_answer") != question["correct_answer"]
+            question["options"] = ["True", "False"]
+            return question, repaired
+
+        if qtype == "open_ended":
+            model_answer = _text(data.get("model_answer"))
+            key_points = data.get("key_points") or []
+            if isinstance(key_points, str):
+                key_points = re.split(r"[\n;]+", key_points)
+                repaired = True
+            key_points = [_text(p).lstrip("-• ") for p in key_points if _text(p)]
+            if not model_answer:
+                return None, repaired
+            question.update(model_answer=model_answer, key_points=key_points)
+            return question, repaired
+
+        # multiple_choice / multiple_answer
+        raw_options = [o for o in data.get("options") or [] if _text(o)]
+        options = []
+        for option in raw_options:
+            clean = OPTION_PREFIX.sub("", _text(option))
+            if clean and clean.lower() not in {o.lower() for o in options}:
+                options.append(clean)
+        repaired |= options != raw_options
+        if len(options) < 2:
+            return None, repaired
+        question["options"] = options
+
+        if qtype == "multiple_choice":
+            answer = _match_option(_text(data.get("correct_answer")), options)
+            if answer is None:
+                return None, repaired
+            repaired |= answer != data.get("correct_answer")
+            question["correct_answer"] = answer
+            return question, repaired
+
+        answers = data.get("correct_answers", data.get("correct_answer"))
+        if isinstance(answers, str):
+            whole = _match_option(_text(answers), options)
+            answers = [whole] if whole else re.split(r"[,;\n]+", answers)
+            repaired = True
+        matched = []
+        for answer in answers or []:
+            option = _match_option(_text(answer), options)
+            if option is None:
+                return None, repaired
+            if option not in matched:
+                matched.append(option)
+        if not matched:
+            return None, repaired
+        repaired |= matched != data.get("correct_answers")
+        question["correct_answers"] = matched
+        return question, repaired
+
+    def stats(self):
+        outputs = self.counters["outputs"]
+        failed = self.counters["parse_failures"] + self.counters["invalid"]
+        return {
+            **self.counters,
+            "parse_failure_rate": round(failed / outputs, 4) if outputs else 0.0,
+            "repair_rate": round(self.counters["repaired"] / outputs, 4) if outputs else 0.0
+        }
@@ -0,0 +1,103 @@
+"""
+Study-material context for quiz generation.
+
+A quiz runs one retrieval for its topic; the top passages are memoized per
+topic with a TTL (repeated quizzes on the same topic skip the embedding and
+the search) and split into compact per-question slices, so every question
+is grounded in a different part of the material and each prompt stays small.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from context_packer import split_sentences
+from ingest_version import VersionSynced
+
+
+class TopicPassageCache(VersionSynced):
+    """LRU + TTL memo of retrieved passages, keyed by topic."""
+
+    def __init__(self, max_entries=128, ttl=900):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (passages, expires_at)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(topic, topic_id=None):
+        return ("id", topic_id) if topic_id is not None else ("text", " ".join(topic.lower().split()))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                    self.counters["evictions"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def put(self, key, passages):
+        with self._lock:
+            self._entries[key] = (passages, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.counters["invalidations"] += 1
+
+    def on_version_change(self):
+        """Drops every entry when the collection is re-ingested."""
+        self.invalidate()
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+
+def passage_slices(passages, count, max_chars=900):
+    """
+    Splits the passages into `count` compact slices. Passages are dealt out
+    round-robin (best first) and each slice is cut at a sentence boundary
+    once it reaches max_chars. Returns a list of strings (empty ones when
+    there are no passages).
+    """
+    buckets = [[] for _ in range(count)]
+    for i, passage in enumerate(passages):
+        buckets[i % count].append(passage)
+    # Fewer passages than questions: reuse them (different question types still vary)
+    for i in range(len(passages), count):
+        if passages:
+            buckets[i].append(passages[i % len(passages)])
+
+    slices = []
+    for bucket in buckets:
+        parts, used = [], 0
+        for passage in bucket:
+            added = False
+            for sentence in split_sentences(passage["reference"]):
+                if used + len(sentence) > max_chars and parts:
+                    break
+                if not added:
+                    parts.append(f"[{passage['document_name']} p.{passage['page_number']}]")
+                    added = True
+                parts.append(sentence[:max_chars])
+                used += min(len(sentence), max_chars)
+            if used >= max_chars:
+                break
+        slices.append("\n".join(parts))
+    return slices
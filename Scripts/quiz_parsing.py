@@ -0,0 +1,76 @@
+"""
+Incremental parsing of LLM question output.
+
+ObjectStreamParser is fed the completion text (all at once or token by token
+from a stream) and returns every top-level JSON object as soon as its closing
+brace arrives, whether the objects stand alone or sit inside a JSON array.
+A malformed or truncated element only loses that element: the rest of the
+batch is still parsed. With level=1 the objects one level inside a wrapper
+object are returned instead, e.g. the items of {"questions": [{...}, ...]}.
+"""
+
+import json
+
+
+class ObjectStreamParser:
+    def __init__(self, level=0):
+        self.level = level
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.errors = 0
+
+    def feed(self, text):
+        """Consumes more text; returns the list of objects completed by it."""
+        objects = []
+        for ch in text:
+            if self._depth == 0:
+                # Outside any object (prose, array brackets): only look for the next "{"
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch] if self.level == 0 else []
+                continue
+
+            if self._depth > self.level:
+                self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+                if self._depth == self.level + 1:
+                    self._buffer = [ch]
+            elif ch == "}":
+                if self._depth == self.level + 1:
+                    try:
+                        value = json.loads("".join(self._buffer))
+                    except ValueError:
+                        self.errors += 1
+                    else:
+                        if isinstance(value, dict):
+                            objects.append(value)
+                    self._buffer = []
+                self._depth -= 1
+        return objects
+
+    @property
+    def pending(self):
+        """True while an object is open (e.g. the output was cut off by max_tokens)."""
+        return self._depth > 0
+
+
+def parse_objects(text):
+    """All complete top-level JSON objects in `text`."""
+    return ObjectStreamParser().feed(text or "")
+
+
+def first_object(text):
+    objects = parse_objects(text)
+    return objects[0] if objects else None
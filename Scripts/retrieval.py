@@ -0,0 +1,88 @@
+"""
+Vector search against Qdrant with the filtering done server-side.
+
+Top-k, the similarity threshold and the payload field projection are all
+passed to query_points(), so hits below the threshold and payload fields the
+caller does not read are never serialized or sent over the wire.
+
+With prefetch_limit > limit the query runs in two stages: the prefetch
+collects `prefetch_limit` candidates with the profile's (quantized / HNSW)
+search params, and the outer query re-ranks only those candidates against
+the original vectors before the top `limit` are returned.
+
+Clients are created with client_kwargs(), which switches the transport to
+gRPC (protobuf instead of JSON) when prefer_grpc is set. The same options
+work for QdrantClient and AsyncQdrantClient; asearch() is the async variant
+of search().
+"""
+
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchValue,
+    Prefetch,
+    QuantizationSearchParams,
+    SearchParams,
+)
+
+# Payload fields read by the chat path (chunk hashes, indices, ... stay on the server)
+DOCUMENT_FIELDS = ["document", "page_number", "text"]
+
+
+def client_kwargs(host, port=6333, grpc_port=6334, prefer_grpc=False, timeout=None):
+    """Keyword arguments for QdrantClient / AsyncQdrantClient."""
+    kwargs = {"host": host, "port": port, "grpc_port": grpc_port, "prefer_grpc": prefer_grpc}
+    if timeout is not None:
+        kwargs["timeout"] = int(timeout)
+    return kwargs
+
+
+def query_kwargs(vector, limit=10, score_threshold=None, fields=None, params=None, prefetch_limit=None,
+                 query_filter=None):
+    """Keyword arguments for QdrantClient.query_points() / AsyncQdrantClient.query_points()."""
+    kwargs = {
+        "query": vector,
+        "limit": limit,
+        "score_threshold": score_threshold,
+        "query_filter": query_filter,
+        "with_payload": list(fields) if fields else True,
+        "with_vectors": False
+    }
+    if prefetch_limit and prefetch_limit > limit:
+        kwargs["prefetch"] = Prefetch(query=vector, limit=prefetch_limit, params=params, filter=query_filter)
+        # Second stage: exact scores from the original vectors for the prefetched candidates
+        kwargs["search_params"] = SearchParams(quantization=QuantizationSearchParams(ignore=True))
+    else:
+        kwargs["search_params"] = params
+    return kwargs
+
+
+def search(client, collection_name, vector, **kwargs):
+    """Returns the ScoredPoints of one query (see query_kwargs for the options)."""
+    return client.query_points(collection_name=collection_name, **query_kwargs(vector, **kwargs)).points
+
+
+async def asearch(client, collection_name, vector, **kwargs):
+    """search() for an AsyncQdrantClient: does not hold a worker thread while waiting."""
+    response = await client.query_points(collection_name=collection_name, **query_kwargs(vector, **kwargs))
+    return response.points
+
+
+def topic_filter(topic_id):
+    """Restricts a query to the chunks of one topic-catalog cluster (see topic_catalog.py)."""
+    return Filter(must=[FieldCondition(key="topic_id", match=MatchValue(value=topic_id))])
+
+
+def hits_to_docs(hits):
+    """Turns Qdrant / LocalIndex hits into the document dicts used by the prompts."""
+    docs = []
+    for h in hits:
+        payload = h.payload or {}
+        docs.append({
+            "point_id": h.id,
+            "document_name": payload.get("document", "Unknown"),
+            "page_number": payload.get("page_number", 0),
+            "reference": payload.get("text", ""),
+            "similarity": h.score
+        })
+    return docs
@@ -0,0 +1,100 @@
+"""
+Semantic answer cache for the chatbot.
+
+Answers are keyed on the normalised query embedding. A lookup returns the
+stored value of the most similar cached query when its cosine similarity is
+at or above the threshold, so re-phrasings of the same question skip the
+vector search and the LLM. Entries expire after a TTL and the least recently
+used entry is evicted once the cache is full.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ingest_version import VersionSynced
+
+
+class SemanticCache(VersionSynced):
+    def __init__(self, max_entries=512, ttl=3600, threshold=0.92):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()  # key -> (vector, value, expires_at)
+        self._next_key = 0
+        self._matrix = None            # stacked vectors, rebuilt lazily
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalise(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, key):
+        del self._entries[key]
+        self._matrix = None
+
+    def _purge_expired(self, now):
+        expired = [k for k, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._drop(key)
+            self.counters["evictions"] += 1
+
+    def lookup(self, vector):
+        """Returns (value, similarity) for the best match above threshold, else (None, best_similarity)."""
+        query = self._normalise(vector)
+        with self._lock:
+            self._purge_expired(time.time())
+            if not self._entries:
+                self.counters["misses"] += 1
+                return None, 0.0
+
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[k][0] for k in self._matrix_keys])
+
+            sims = self._matrix @ query
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < self.threshold:
+                self.counters["misses"] += 1
+                return None, similarity
+
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return self._entries[key][1], similarity
+
+    def store(self, vector, value):
+        with self._lock:
+            self._entries[self._next_key] = (self._normalise(vector), value, time.time() + self.ttl)
+            self._next_key += 1
+            self._matrix = None
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.counters["invalidations"] += 1
+
+    def on_version_change(self):
+        """Drops every entry when the underlying collection is re-ingested."""
+        self.invalidate()
+
+    def stats(self):
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold
+        }
@@ -0,0 +1,344 @@
+"""
+Topic catalog derived from the ingested chunks.
+
+After ingestion the chunk embeddings are clustered (spherical k-means), each
+cluster is labeled with its most distinctive terms (class-based TF-IDF over
+the chunk texts), every point gets its cluster in the `topic_id` payload
+field, and the catalog is written to topic_catalog.json:
+
+    {"collection", "created_at", "updated_at", "centroids",
+     "topics": [{"id", "label", "keywords", "size", "documents"}, ...]}
+
+A full build scrolls the vectors into one preallocated float32 array and
+counts terms batch by batch in a second, vector-less scroll, so no chunk
+text is held in memory. Incremental ingestion runs only assign the points
+without a topic_id (new or changed chunks) to the stored centroids and
+refresh the topic sizes: labels stay stable, so banked quiz questions keep
+their topics. A full re-cluster happens when there is no usable catalog or
+most of the collection is unassigned (e.g. after a settings rebuild).
+
+The apps keep the catalog in memory (TopicCatalog) and reload it when the
+collection is re-ingested, so picking a quiz topic is a random.choice().
+
+    python Scripts/topic_catalog.py build [--topics N]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from local_index import scroll_points
+from ingest_version import VersionSynced
+
+TOPIC_CATALOG = Path(os.getenv("TOPIC_CATALOG", str(Path(__file__).parent.parent / "topic_catalog.json")))
+DEFAULT_TOPIC = "network security"
+SET_PAYLOAD_BATCH = 1000
+# Re-cluster from scratch once more than this share of the points has no topic
+REBUILD_FRACTION = 0.5
+
+STOPWORDS = set("""
+a about above after again against all also an and any are as at be because been before being below between
+both but by can could did do does doing down during each either etc few for from further had has have having
+he her here hers him his how however i if in into is it its itself just many may me might more most much must
+my no nor not now of off on once one only or other our out over own per same she should since so some such
+than that the their them then there these they this those through thus to too two under until up upon us use
+used uses using very via was we were what when where which while who whom why will with within without would
+yet you your figure table chapter section page example see also shown following e.g i.e
+""".split())
+WORD_RE = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+
+# =============================================
+# Clustering
+# =============================================
+def normalise_rows(vectors, out=None):
+    return np.divide(vectors, np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12), out=out)
+
+
+def kmeans(vectors, k, iterations=25, seed=0, in_place=False):
+    """
+    Spherical k-means (cosine) with k-means++ seeding. Returns (labels, centroids).
+    in_place normalises `vectors` itself instead of a copy.
+    """
+    rng = np.random.default_rng(seed)
+    data = normalise_rows(vectors, out=vectors if in_place else None)
+    n = len(data)
+
+    centroids = [data[rng.integers(n)]]
+    distance = 1.0 - data @ centroids[0]
+    for _ in range(1, k):
+        weights = np.maximum(distance, 0) ** 2
+        total = weights.sum()
+        pick = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centroids.append(data[pick])
+        distance = np.minimum(distance, 1.0 - data @ data[pick])
+    centroids = np.stack(centroids)
+
+    labels = np.full(n, -1)
+    for _ in range(iterations):
+        new_labels = np.argmax(data @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = data[labels == c]
+            if len(members):
+                mean = members.sum(axis=0)
+                centroids[c] = mean / (np.linalg.norm(mean) or 1.0)
+    return labels, centroids
+
+
+def default_topic_count(n):
+    return max(1, min(40, n, int(math.sqrt(n / 2))))
+
+
+# =============================================
+# Labeling
+# =============================================
+def terms(text):
+    words = [w.strip("-") for w in WORD_RE.findall(text.lower())]
+    words = [w for w in words if len(w) > 2 and w not in STOPWORDS and not w.isdigit()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def label_clusters(texts, labels, k, keywords=5):
+    """Top class-based TF-IDF terms per cluster: frequent inside it, rare in the others."""
+    counts = [Counter() for _ in range(k)]
+    for text, label in zip(texts, labels):
+        counts[label].update(terms(text))
+    return label_from_counts(counts, k, keywords)
+
+
+def label_from_counts(counts, k, keywords=5):
+    """label_clusters() on per-cluster term Counters accumulated by the caller."""
+    cluster_freq = Counter()
+    for counter in counts:
+        cluster_freq.update(counter.keys())
+
+    results = []
+    for counter in counts:
+        total = sum(counter.values()) or 1
+        scored = sorted(
+            ((count / total) * math.log(1 + k / cluster_freq[term]), term)
+            for term, count in counter.items() if count > 1
+        )
+        picked = []
+        for _, term in reversed(scored):
+            # Skip terms sharing a word with an already picked one
+            if any(set(term.split()) & set(p.split()) for p in picked):
+                continue
+            picked.append(term)
+            if len(picked) == keywords:
+                break
+        results.append(picked)
+    return results
+
+
+# =============================================
+# Build / load
+# =============================================
+def build_catalog(client, collection_name, path=TOPIC_CATALOG, k=None, incremental=False):
+    """
+    Clusters every point of the collection, tags points with `topic_id` and writes
+    the catalog. With incremental=True only untagged points are assigned to the
+    existing topics, unless a full re-cluster is needed.
+    """
+    if incremental:
+        catalog = update_catalog(client, collection_name, path)
+        if catalog is not None:
+            return catalog
+    from qdrant_client.http.models import PayloadSchemaType
+
+    n = client.count(collection_name, exact=True).count
+    if not n:
+        return None
+
+    # Pass 1: vectors only, into one preallocated array
+    ids, vectors = [], None
+    for pid, vector, _ in scroll_points(client, collection_name, with_payload=False):
+        if vectors is None:
+            vectors = np.empty((n, len(vector)), dtype=np.float32)
+        if len(ids) == n:
+            break
+        vectors[len(ids)] = vector
+        ids.append(pid)
+    vectors = vectors[:len(ids)]
+
+    k = min(k or default_topic_count(len(ids)), len(ids))
+    labels, centroids = kmeans(vectors, k, in_place=True)
+    del vectors
+
+    # Pass 2: payloads only; terms and documents are counted per cluster as the batches arrive
+    row_of = {pid: row for row, pid in enumerate(ids)}
+    counts = [Counter() for _ in range(k)]
+    documents = [Counter() for _ in range(k)]
+    for pid, _, payload in scroll_points(client, collection_name, with_vectors=False,
+                                         with_payload=["text", "document"]):
+        row = row_of.get(pid)
+        if row is None:
+            continue
+        counts[labels[row]].update(terms(payload.get("text", "")))
+        documents[labels[row]][payload.get("document", "Unknown")] += 1
+    keywords = label_from_counts(counts, k)
+    del counts, row_of
+
+    topics = []
+    for c in range(k):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        _set_topic(client, collection_name, c, [ids[i] for i in members])
+        topics.append({
+            "id": c,
+            "label": ", ".join(keywords[c][:3]) or DEFAULT_TOPIC,
+            "keywords": keywords[c],
+            "size": int(len(members)),
+            "documents": [name for name, _ in documents[c].most_common(3)]
+        })
+    client.create_payload_index(collection_name, "topic_id", field_schema=PayloadSchemaType.INTEGER)
+
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    catalog = {
+        "collection": collection_name,
+        "created_at": now,
+        "updated_at": now,
+        "centroids": np.round(centroids, 5).tolist(),
+        "topics": topics
+    }
+    save_catalog(catalog, path)
+    return catalog
+
+
+def update_catalog(client, collection_name, path=TOPIC_CATALOG):
+    """
+    Assigns points without a topic_id to the nearest stored centroid and refreshes
+    the topic sizes. Returns None when a full build is needed instead.
+    """
+    from qdrant_client.http.models import (
+        FieldCondition, Filter, IsEmptyCondition, MatchValue, PayloadField
+    )
+
+    catalog = load_catalog(path)
+    if not catalog or catalog.get("collection") != collection_name or not catalog.get("centroids"):
+        return None
+    centroids = normalise_rows(np.asarray(catalog["centroids"], dtype=np.float32))
+
+    untagged = Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="topic_id"))])
+    total = client.count(collection_name, exact=True).count
+    pending = client.count(collection_name, count_filter=untagged, exact=True).count
+    if not total or pending > REBUILD_FRACTION * total:
+        return None
+
+    assigned = {}
+    for pid, vector, _ in scroll_points(client, collection_name, with_payload=False, scroll_filter=untagged):
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape[0] != centroids.shape[1]:
+            return None
+        assigned.setdefault(int(np.argmax(centroids @ vector)), []).append(pid)
+    for c, members in assigned.items():
+        _set_topic(client, collection_name, c, members)
+
+    by_id = {t["id"]: t for t in catalog["topics"]}
+    for c in range(len(centroids)):
+        size = client.count(
+            collection_name,
+            count_filter=Filter(must=[FieldCondition(key="topic_id", match=MatchValue(value=c))]),
+            exact=True
+        ).count
+        if c in by_id:
+            by_id[c]["size"] = size
+        elif size:
+            # Topic that was empty at build time: no keywords were derived for it
+            by_id[c] = {"id": c, "label": DEFAULT_TOPIC, "keywords": [], "size": size, "documents": []}
+    catalog["topics"] = sorted(by_id.values(), key=lambda t: t["id"])
+    catalog["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    save_catalog(catalog, path)
+    return catalog
+
+
+def _set_topic(client, collection_name, topic_id, point_ids):
+    for start in range(0, len(point_ids), SET_PAYLOAD_BATCH):
+        client.set_payload(
+            collection_name=collection_name,
+            payload={"topic_id": topic_id},
+            points=point_ids[start:start + SET_PAYLOAD_BATCH],
+            wait=True
+        )
+
+
+def save_catalog(catalog, path=TOPIC_CATALOG):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(catalog, indent=1, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def load_catalog(path=TOPIC_CATALOG):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+class TopicCatalog(VersionSynced):
+    """In-memory topic catalog; reloaded from disk when the ingest version changes."""
+
+    def __init__(self, path=TOPIC_CATALOG):
+        self.path = Path(path)
+        self.topics = []
+        self.by_id = {}
+        self.reload()
+
+    def reload(self):
+        catalog = load_catalog(self.path)
+        # Topics emptied by later (incremental) ingestion runs keep their id but are not offered
+        self.topics = [t for t in catalog["topics"] if t.get("size", 1)] if catalog else []
+        self.by_id = {t["id"]: t for t in self.topics}
+        return len(self.topics)
+
+    def on_version_change(self):
+        self.reload()
+
+    def __len__(self):
+        return len(self.topics)
+
+    def random_topic(self):
+        """A random topic entry, or None when there is no catalog."""
+        return random.choice(self.topics) if self.topics else None
+
+    def random_label(self):
+        topic = self.random_topic()
+        return topic["label"] if topic else DEFAULT_TOPIC
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the topic catalog of the collection.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default="network_security_docs")
+    parser.add_argument("--topics", type=int, default=None, help="Number of clusters (default: sqrt(n/2))")
+    parser.add_argument("--output", default=str(TOPIC_CATALOG))
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    client = QdrantClient(host=args.host, port=args.port)
+    catalog = build_catalog(client, args.collection, args.output, args.topics)
+    if catalog is None:
+        print(f"❌ Collection '{args.collection}' is empty")
+        return
+    print(f"✔ {len(catalog['topics'])} topics written to {args.output}")
+    for topic in catalog["topics"]:
+        print(f"   [{topic['id']:>2}] {topic['label']} ({topic['size']} chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,68 @@
 import os
+import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 import requests
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
 from jinja2 import Environment, FileSystemLoader, select_autoescape
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from pydantic import BaseModel
 import random
 import json
-import re
+import asyncio
+
+# Sibling modules in Scripts/ (works for both `python Scripts/unified_app.py`
+# and `uvicorn Scripts.unified_app:app`)
+sys.path.insert(0, str(Path(__file__).parent))
+from llm_client import LLMClient, LLMError
+from semantic_cache import SemanticCache
+from embedding_batcher import EmbeddingBatcher
+from model_registry import ModelRegistry
+from context_packer import ContextPacker
+from local_index import LocalIndex, LOCAL_INDEX_DIR
+from index_artifact import ensure_collection, ensure_local_index
+from qdrant_profiles import search_params, get_profile
+from topic_catalog import TopicCatalog
+from ingest_version import read_ingest_version
+from quiz_context import TopicPassageCache, passage_slices
+from question_bank import QuestionBank, topic_key
+from answer_pregrader import AnswerPreGrader
+from quiz_parsing import ObjectStreamParser, first_object
+from question_schema import (
+    QuestionValidator, question_response_format, batch_response_format, json_schema_format, GRADE_JSON_SCHEMA
+)
+from retrieval import DOCUMENT_FIELDS, client_kwargs, search as qdrant_search, asearch, hits_to_docs, topic_filter
 
 # ============================================================
 # FASTAPI SETUP
 # ============================================================
-app = FastAPI(title="Network Security Tutor - Unified Application")
+@asynccontextmanager
+async def lifespan(app):
+    # Load the embedding model in the background; requests that arrive
+    # before it is warm simply wait for the shared load to finish.
+    global aqdrant
+    warmup_task = asyncio.create_task(models.warmup([CHATBOT_EMBED_MODEL]))
+    # Shared async Qdrant client for the request path (same server/transport as `qdrant`)
+    if qdrant_remote and QDRANT_ASYNC:
+        aqdrant = AsyncQdrantClient(**QDRANT_CLIENT_KWARGS)
+    # Keeps the question bank pools topped up while the app is idle
+    refill_task = asyncio.create_task(refill_question_bank()) if QUESTION_BANK_REFILL else None
+    yield
+    warmup_task.cancel()
+    if refill_task is not None:
+        refill_task.cancel()
+    question_bank.close()
+    if aqdrant is not None:
+        await aqdrant.close()
+        aqdrant = None
+    if qdrant is not None:
+        qdrant.close()
+    await embed_batcher.aclose()
+    await llm.aclose()
+
+
+app = FastAPI(title="Network Security Tutor - Unified Application", lifespan=lifespan)
 
 # Paths
 script_dir = Path(__file__).parent
@@ -31,15 +79,90 @@ def render_template(name, **kwargs):
     return jinja_env.get_template(name).render(**kwargs)
 
 # Configuration
-QDRANT_HOST = "localhost"
-QDRANT_PORT = 6333
+QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+# gRPC transport (protobuf instead of JSON) and the non-blocking async client for searches
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "0") == "1"
+QDRANT_ASYNC = os.getenv("QDRANT_ASYNC", "1") == "1"
+QDRANT_CLIENT_KWARGS = client_kwargs(QDRANT_HOST, QDRANT_PORT, QDRANT_GRPC_PORT, QDRANT_PREFER_GRPC)
 COLLECTION_NAME = "network_security_docs"
 RELEVANCE_THRESHOLD = 0.40
 NUM_QUESTIONS = 5
 
+# Semantic answer cache (re-phrased questions reuse stored answers)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+# Touched by Data_insertion_qdrant.py after every ingestion run
+INGEST_MARKER = project_root / ".ingest_version"
+
+# Query embedding micro-batching
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+# Quiz generation fan-out
+QUIZ_CONCURRENCY = int(os.getenv("QUIZ_CONCURRENCY", "3"))
+QUESTION_TIMEOUT = float(os.getenv("QUESTION_TIMEOUT", "45"))
+
+# Quiz grading: open-ended answers are LLM-graded concurrently (capped per submission)
+GRADING_CONCURRENCY = int(os.getenv("GRADING_CONCURRENCY", "4"))
+GRADING_TIMEOUT = float(os.getenv("GRADING_TIMEOUT", "45"))
+
+# Embedding pre-grader: open-ended answers scoring <= LOW or >= HIGH skip the LLM;
+# AUDIT_RATE of those are still LLM-graded to measure agreement
+PREGRADER_ENABLED = os.getenv("PREGRADER_ENABLED", "1") == "1"
+PREGRADER_LOW = float(os.getenv("PREGRADER_LOW", "0.3"))
+PREGRADER_HIGH = float(os.getenv("PREGRADER_HIGH", "0.8"))
+PREGRADER_POINT_THRESHOLD = float(os.getenv("PREGRADER_POINT_THRESHOLD", "0.6"))
+PREGRADER_AUDIT_RATE = float(os.getenv("PREGRADER_AUDIT_RATE", "0.05"))
+
+# Quiz grounding: passages retrieved once per quiz topic (memoized), sliced per question
+QUIZ_CONTEXT_K = int(os.getenv("QUIZ_CONTEXT_K", "8"))
+QUIZ_CONTEXT_THRESHOLD = float(os.getenv("QUIZ_CONTEXT_THRESHOLD", "0.25"))
+QUIZ_CONTEXT_TTL = float(os.getenv("QUIZ_CONTEXT_TTL", "900"))
+QUIZ_SLICE_CHARS = int(os.getenv("QUIZ_SLICE_CHARS", "900"))
+
+# Pre-generated question bank: target questions per (topic, type) pool,
+# near-duplicate cutoff, pause when every pool is full / after a failure
+QUESTION_BANK_REFILL = os.getenv("QUESTION_BANK_REFILL", "1") == "1"
+QUESTION_BANK_DEPTH = int(os.getenv("QUESTION_BANK_DEPTH", "3"))
+QUESTION_BANK_DUP_THRESHOLD = float(os.getenv("QUESTION_BANK_DUP_THRESHOLD", "0.9"))
+QUESTION_BANK_IDLE = float(os.getenv("QUESTION_BANK_IDLE", "30"))
+QUESTION_BANK_MAX_REJECTS = 5
+
+# Batched generation: all live questions of a quiz in one completion (JSON array);
+# only missing / invalid ones are re-requested, up to QUIZ_BATCH_RETRIES times
+QUIZ_BATCH_GENERATION = os.getenv("QUIZ_BATCH_GENERATION", "1") == "1"
+QUIZ_BATCH_RETRIES = int(os.getenv("QUIZ_BATCH_RETRIES", "1"))
+QUIZ_BATCH_TIMEOUT = float(os.getenv("QUIZ_BATCH_TIMEOUT", "120"))
+QUESTION_MAX_TOKENS = 350
+
 # LM Studio API endpoint (local GPU)
 LMSTUDIO_URL = "http://192.168.96.1:1234/v1/chat/completions"
 LMSTUDIO_MODEL = "meta-llama-3.1-8b-instruct"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# JSON-schema constrained output (response_format); dropped automatically if the backend rejects it
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") == "1"
+
+# Prompt context packing
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+CONTEXT_MAX_SENTENCES = int(os.getenv("CONTEXT_MAX_SENTENCES", "8"))
+CONTEXT_DUP_THRESHOLD = float(os.getenv("CONTEXT_DUP_THRESHOLD", "0.92"))
+CONTEXT_SENTENCE_CACHE = int(os.getenv("CONTEXT_SENTENCE_CACHE", "4096"))  # pages whose sentence vectors are kept
+
+# Collection profile (must match the one used at ingestion, see qdrant_profiles.py)
+QDRANT_PROFILE, _ = get_profile()
+QDRANT_SEARCH_PARAMS = search_params(QDRANT_PROFILE)
+
+# Retrieval: top-k and threshold are applied by Qdrant / the local index,
+# RETRIEVAL_PREFETCH_K > RETRIEVAL_TOP_K enables the two-stage (prefetch + re-rank) query
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "10"))
+RETRIEVAL_PREFETCH_K = int(os.getenv("RETRIEVAL_PREFETCH_K", "0"))
+
+# Embedding model used for retrieval (must match the ingested collection)
+CHATBOT_EMBED_MODEL = "all-MiniLM-L6-v2"
 
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY", "0296b30af4db54f0c40dfac526966c93ef22816317822c3935bfec0d614adfe4")
 
@@ -49,28 +172,99 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY", "0296b30af4db54f0c40dfac526966c93
 
 print("--- SYSTEM STARTUP ---")
 
-# 1. Embedding Model for Chatbot
-print("1. Loading Embedding Model for Chatbot...")
-embedder_chatbot = SentenceTransformer("all-MiniLM-L6-v2")
+# 1. Embedding models (loaded lazily / by the startup warmup task)
+print(f"1. Registering Embedding Model '{CHATBOT_EMBED_MODEL}' (lazy load)...")
+models = ModelRegistry()
 
-# 2. Embedding Model for Quiz
-print("2. Loading Embedding Model for Quiz...")
-embedder_quiz = SentenceTransformer("multi-qa-MiniLM-L6-cos-v1")
 
-# 3. Qdrant Client
-print(f"3. Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}...")
+def embedder_chatbot():
+    return models.get(CHATBOT_EMBED_MODEL)
+
+
+# 2. Qdrant Client (or the local NumPy index snapshot when Qdrant is down)
+transport = f"gRPC :{QDRANT_GRPC_PORT}" if QDRANT_PREFER_GRPC else "REST"
+print(f"2. Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT} ({transport})...")
+local_index = None
+aqdrant = None  # AsyncQdrantClient, opened / closed by the lifespan
+qdrant_remote = False
 try:
-    qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    qdrant = QdrantClient(**QDRANT_CLIENT_KWARGS)
     qdrant.get_collections()
+    qdrant_remote = True
     print("   [OK] Connected to Qdrant.\n")
 except Exception as e:
-    print(f"   [WARN] Qdrant server not found. Using in-memory mode...")
+    print(f"   [WARN] Qdrant server not found. Loading local index from {LOCAL_INDEX_DIR}...")
+    qdrant = None
     try:
-        qdrant = QdrantClient(":memory:")
-        print("   [OK] In-memory Qdrant initialized.\n")
-    except Exception as mem_err:
-        print(f"   [ERROR] Could not initialize Qdrant: {mem_err}")
-        qdrant = None
+        ensure_local_index(LOCAL_INDEX_DIR, model=CHATBOT_EMBED_MODEL)
+    except Exception as restore_err:
+        print(f"   [WARN] Could not build local index from artifact: {restore_err}")
+    local_index = LocalIndex.load(LOCAL_INDEX_DIR)
+    if local_index is not None:
+        print(f"   [OK] Local index loaded ({len(local_index)} vectors).\n")
+    else:
+        try:
+            qdrant = QdrantClient(":memory:")
+            print("   [OK] In-memory Qdrant initialized (empty — answers will use web search).\n")
+        except Exception as mem_err:
+            print(f"   [ERROR] Could not initialize Qdrant: {mem_err}")
+
+# Cold start: restore a baked-in index artifact into an empty Qdrant
+if qdrant is not None and local_index is None:
+    try:
+        ensure_collection(qdrant, COLLECTION_NAME, model=CHATBOT_EMBED_MODEL)
+    except Exception as restore_err:
+        print(f"   [WARN] Could not restore index artifact: {restore_err}")
+
+# 3. Shared LLM client (pooled keep-alive connections)
+llm = LLMClient(
+    LMSTUDIO_URL, LMSTUDIO_MODEL,
+    timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES, structured_output=LLM_STRUCTURED_OUTPUT
+)
+
+# 4. Semantic answer cache
+answer_cache = SemanticCache(
+    max_entries=SEMANTIC_CACHE_SIZE,
+    ttl=SEMANTIC_CACHE_TTL,
+    threshold=SEMANTIC_CACHE_THRESHOLD
+)
+
+# 5. Query embedding batcher
+embed_batcher = EmbeddingBatcher(
+    lambda texts: embedder_chatbot().encode(texts, batch_size=len(texts)),
+    max_batch=EMBED_MAX_BATCH,
+    max_wait=EMBED_MAX_WAIT_MS / 1000
+)
+
+# 6. Token-budgeted context packer
+context_packer = ContextPacker(
+    lambda sentences: embedder_chatbot().encode(sentences, batch_size=64),
+    token_budget=CONTEXT_TOKEN_BUDGET,
+    max_sentences=CONTEXT_MAX_SENTENCES,
+    dup_threshold=CONTEXT_DUP_THRESHOLD,
+    cache_size=CONTEXT_SENTENCE_CACHE
+)
+
+# 7. Quiz topic catalog (built by the ingestion, reloaded after re-ingestion)
+topic_catalog = TopicCatalog()
+print(f"7. Topic catalog: {len(topic_catalog)} topics.")
+quiz_passages = TopicPassageCache(ttl=QUIZ_CONTEXT_TTL)
+
+# 8. Pre-generated question bank (SQLite)
+question_bank = QuestionBank(dup_threshold=QUESTION_BANK_DUP_THRESHOLD)
+print(f"8. Question bank: {question_bank.stats()['questions']} questions banked.")
+
+# 9. Schema validation / repair of generated questions
+question_validator = QuestionValidator()
+
+# 10. Embedding pre-grader for open-ended answers
+answer_pregrader = AnswerPreGrader(
+    lambda texts: embedder_chatbot().encode(texts, batch_size=len(texts)),
+    low=PREGRADER_LOW,
+    high=PREGRADER_HIGH,
+    point_threshold=PREGRADER_POINT_THRESHOLD,
+    audit_rate=PREGRADER_AUDIT_RATE
+)
 
 print("--- STARTUP COMPLETE ---\n")
 
@@ -78,30 +272,13 @@ print("--- STARTUP COMPLETE ---\n")
 # LM STUDIO FUNCTIONS
 # ============================================================
 
-def lm_studio_generate(system_prompt, user_prompt, temperature=0.1, max_tokens=400):
+async def lm_studio_generate(system_prompt, user_prompt, temperature=0.1, max_tokens=400):
     """Sends prompt to LM Studio (GPU accelerated local API)."""
     try:
-        response = requests.post(
-            LMSTUDIO_URL,
-            json={
-                "model": LMSTUDIO_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ] if system_prompt else [{"role": "user", "content": user_prompt}],
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "stream": False
-            }
-        )
-
-        if response.status_code != 200:
-            print("LM Studio API Error:", response.text)
-            return "Error: LLM request failed."
-
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
-
+        return await llm.generate(system_prompt, user_prompt, temperature=temperature, max_tokens=max_tokens)
+    except LLMError as e:
+        print("LM Studio API Error:", e)
+        return "Error: LLM request failed."
     except Exception as e:
         return f"LM Studio Connection Error: {str(e)}"
 
@@ -109,36 +286,63 @@ def lm_studio_generate(system_prompt, user_prompt, temperature=0.1, max_tokens=4
 # CHATBOT FUNCTIONS
 # ============================================================
 
-def find_relevant_documents(prompt: str):
-    """Encodes prompt + searches Qdrant."""
-    if not qdrant:
+def embed_query(prompt: str):
+    return embedder_chatbot().encode(prompt).tolist()
+
+
+def search_options(top_k, score_threshold, fields, prefetch_k, query_filter=None):
+    return {
+        "limit": top_k,
+        "score_threshold": score_threshold,
+        "fields": fields,
+        "params": QDRANT_SEARCH_PARAMS,
+        "prefetch_limit": RETRIEVAL_PREFETCH_K if prefetch_k is None else prefetch_k,
+        "query_filter": query_filter
+    }
+
+
+def find_relevant_documents(prompt: str, embed=None, top_k=None, score_threshold=RELEVANCE_THRESHOLD,
+                            fields=DOCUMENT_FIELDS, prefetch_k=None, query_filter=None):
+    """
+    Encodes prompt (unless an embedding is given) + searches Qdrant or the local index.
+    Only the top_k hits at or above score_threshold come back, with just `fields` of the payload.
+    """
+    if not qdrant and local_index is None:
         return []
 
-    embed = embedder_chatbot.encode(prompt).tolist()
+    if embed is None:
+        embed = embed_query(prompt)
 
+    top_k = top_k or RETRIEVAL_TOP_K
     try:
-        results = qdrant.query_points(
-            collection_name=COLLECTION_NAME,
-            query=embed,
-            with_payload=True,
-            with_vectors=False
-        )
-
-        hits = results.points
-        docs = []
-
-        for h in hits:
-            payload = h.payload or {}
-            docs.append({
-                "document_name": payload.get("document", "Unknown"),
-                "page_number": payload.get("page_number", 0),
-                "reference": payload.get("text", ""),
-                "similarity": h.score
-            })
-
-        # Apply threshold filter
-        return [d for d in docs if d["similarity"] >= RELEVANCE_THRESHOLD]
+        if qdrant:
+            hits = qdrant_search(qdrant, COLLECTION_NAME, embed,
+                                 **search_options(top_k, score_threshold, fields, prefetch_k, query_filter))
+        else:
+            hits = local_index.search(embed, limit=top_k, score_threshold=score_threshold, fields=fields)
+
+        return hits_to_docs(hits)
+
+    except Exception as e:
+        print("Qdrant Error:", e)
+        return []
 
+
+async def retrieve_documents(prompt: str, embed, top_k=None, score_threshold=RELEVANCE_THRESHOLD,
+                             fields=DOCUMENT_FIELDS, prefetch_k=None, query_filter=None):
+    """
+    find_relevant_documents() for the request path: awaits the async Qdrant client
+    when it is open, otherwise runs the sync search in a worker thread.
+    The local index has no payload filters, so query_filter only applies to Qdrant.
+    """
+    if aqdrant is None:
+        return await asyncio.to_thread(find_relevant_documents, prompt, embed, top_k, score_threshold,
+                                       fields, prefetch_k, query_filter)
+    try:
+        hits = await asearch(aqdrant, COLLECTION_NAME, embed,
+                             **search_options(top_k or RETRIEVAL_TOP_K, score_threshold, fields, prefetch_k,
+                                              query_filter))
+        return hits_to_docs(hits)
     except Exception as e:
         print("Qdrant Error:", e)
         return []
@@ -166,35 +370,118 @@ def web_search(query):
         return ["Internet Search Failure.", "Error"]
 
 
-def generate_response_logic(prompt):
-    docs = find_relevant_documents(prompt)
+def build_system_prompt(docs):
+    context = "\n\n".join(
+        f"[{d['document_name']} Pg {d['page_number']}]\n{d['reference']}"
+        for d in docs
+    )
 
-    if docs:
-        context = "\n\n".join(
-            f"[{d['document_name']} Pg {d['page_number']}]\n{d['reference']}"
-            for d in docs
-        )
-
-        system_prompt = f"""
+    return f"""
 You are a Network Security Tutor. 
 Use ONLY the CONTEXT to answer. Do NOT hallucinate. Do NOT duplicate content.
 CONTEXT:
 {context}
 """
 
-        response = lm_studio_generate(system_prompt, prompt)
 
-        sources = "\n".join(
-            f"📄 {d['document_name']} (Pg {d['page_number']}) — Score: {d['similarity']:.2f}"
-            for d in docs
-        )
+def format_sources(docs):
+    return "\n".join(
+        f"📄 {d['document_name']} (Pg {d['page_number']}) — Score: {d['similarity']:.2f}"
+        for d in docs
+    )
+
+
+async def pack_context(embed, docs):
+    """Trims retrieved pages to the query-relevant sentences within the token budget."""
+    packed, metrics = await asyncio.to_thread(context_packer.pack, embed, docs)
+    print(f"Context: {metrics['tokens_before']} -> {metrics['tokens_after']} tokens "
+          f"({metrics['docs_out']}/{metrics['docs_in']} passages)")
+    return packed
+
+
+def ingest_version():
+    """Changes whenever the collection is re-ingested."""
+    return read_ingest_version(INGEST_MARKER)
 
+
+def is_llm_error(response):
+    return response.startswith(("Error: LLM request failed", "LM Studio Connection Error"))
+
+
+async def generate_response_logic(prompt):
+    embed = await embed_batcher.encode(prompt)
+
+    answer_cache.sync_version(ingest_version())
+    cached, _ = answer_cache.lookup(embed)
+    if cached:
+        return cached
+
+    docs = await retrieve_documents(prompt, embed)
+
+    if docs:
+        docs = await pack_context(embed, docs)
+        system_prompt = build_system_prompt(docs)
+        response = await lm_studio_generate(system_prompt, prompt)
+        sources = format_sources(docs)
+        if not is_llm_error(response):
+            answer_cache.store(embed, (response, sources))
         return response, sources
 
     # No docs → Web search
-    snippet, src = web_search(prompt)
+    snippet, src = await asyncio.to_thread(web_search, prompt)
     return snippet, src
 
+
+def sse_event(event, data):
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_response_logic(prompt):
+    """
+    Same flow as generate_response_logic, but as an SSE stream: sources are
+    sent as soon as retrieval finishes, then LLM tokens as they arrive.
+    """
+    embed = await embed_batcher.encode(prompt)
+
+    answer_cache.sync_version(ingest_version())
+    cached, _ = answer_cache.lookup(embed)
+    if cached:
+        response, sources = cached
+        yield sse_event("sources", {"source": sources})
+        yield sse_event("token", {"token": response})
+        yield sse_event("done", {})
+        return
+
+    docs = await retrieve_documents(prompt, embed)
+
+    if not docs:
+        snippet, src = await asyncio.to_thread(web_search, prompt)
+        yield sse_event("sources", {"source": src})
+        yield sse_event("token", {"token": snippet})
+        yield sse_event("done", {})
+        return
+
+    docs = await pack_context(embed, docs)
+    sources = format_sources(docs)
+    yield sse_event("sources", {"source": sources})
+
+    messages = llm.build_messages(build_system_prompt(docs), prompt)
+    tokens = []
+    try:
+        async for token in llm.stream(messages, temperature=0.1, max_tokens=400):
+            tokens.append(token)
+            yield sse_event("token", {"token": token})
+        if tokens:
+            answer_cache.store(embed, ("".join(tokens), sources))
+    except LLMError as e:
+        print("LM Studio API Error:", e)
+        yield sse_event("error", {"error": "Error: LLM request failed."})
+    except Exception as e:
+        yield sse_event("error", {"error": f"LM Studio Connection Error: {str(e)}"})
+
+    yield sse_event("done", {})
+
 # ============================================================
 # QUIZ FUNCTIONS
 # ============================================================
@@ -206,137 +493,327 @@ QUESTION_TYPES = [
     "open_ended"
 ]
 
-def lmstudio_generate(prompt):
-    """Generate response using LM Studio for quiz."""
+async def lmstudio_generate(prompt, response_format=None):
+    """Generate response using LM Studio for quiz (optionally constrained to a JSON schema)."""
+    extra = {"response_format": response_format} if response_format else {}
     try:
-        resp = requests.post(
-            LMSTUDIO_URL,
-            json={
-                "model": LMSTUDIO_MODEL,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.55,
-                "max_tokens": 350
-            },
-            timeout=30
-        ).json()
-        return resp["choices"][0]["message"]["content"]
+        return await llm.generate(None, prompt, temperature=0.55, max_tokens=QUESTION_MAX_TOKENS, **extra)
     except Exception as e:
         print("LM Studio ERROR:", e)
         return None
 
 
 def clean_json(text):
-    """Extract clean JSON from LLM."""
-    m = re.search(r"\{[\s\S]*\}", text)
-    if m:
-        try:
-            return json.loads(m.group())
-        except:
-            return None
-    return None
+    """First complete JSON object in the LLM output (None if there is none)."""
+    return first_object(text)
 
 
 def get_random_topic():
-    """Extract topics from Qdrant payloads."""
-    try:
-        items, _ = qdrant.scroll(
-            collection_name=COLLECTION_NAME,
-            with_payload=True,
-            limit=200
-        )
-        topics = set()
-        for p in items:
-            md = p.payload
-            if md and "topic" in md:
-                topics.add(md["topic"])
-        return random.choice(list(topics)) if topics else "network security"
-    except:
-        return "network security"
-
-
-def generate_question(topic=None):
-    if not topic:
-        topic = get_random_topic()
+    """Random topic entry from the in-memory catalog, or None without one."""
+    topic_catalog.sync_version(ingest_version())
+    return topic_catalog.random_topic()
 
-    qtype = random.choice(QUESTION_TYPES)
 
-    prompt = f"""
-You are a cybersecurity exam expert.
-Generate ONE question of type "{qtype}" on topic "{topic}".
-Reply in VALID JSON ONLY.
-
-RULES:
-True/False JSON:
-{{
+# JSON shape per question type; a prompt only carries the schema of its own type
+QUESTION_SCHEMAS = {
+    "true_false": """{
   "question": "...",
   "type": "true_false",
   "options": ["True", "False"],
   "correct_answer": "True" or "False",
   "explanation": "..."
-}}
-
-Multiple Choice JSON:
-{{
+}""",
+    "multiple_choice": """{
   "question": "...",
   "type": "multiple_choice",
   "options": ["Full text of option A", "Full text of option B", "Full text of option C", "Full text of option D"],
   "correct_answer": "Full text of the correct option",
   "explanation": "..."
-}}
-
-Multiple Answer JSON:
-{{
+}
+Options must be FULL COMPLETE SENTENCES, not just letters.""",
+    "multiple_answer": """{
   "question": "...",
   "type": "multiple_answer",
   "options": ["Full text of option A", "Full text of option B", "Full text of option C", "Full text of option D"],
   "correct_answers": ["Full text of correct option 1", "Full text of correct option 2"],
   "explanation": "..."
-}}
-
-Open-Ended JSON:
-{{
+}
+Options must be FULL COMPLETE SENTENCES, not just letters.""",
+    "open_ended": """{
   "question": "...",
   "type": "open_ended",
   "model_answer": "<detailed expected answer>",
   "key_points": ["point1", "point2", "point3"],
   "explanation": "..."
-}}
-
-IMPORTANT:
-- OUTPUT JSON ONLY.
-- No markdown.
-- No text outside JSON.
-- For multiple_choice and multiple_answer: options must contain FULL COMPLETE SENTENCES, not just letters!
-- For open_ended questions, provide a comprehensive model_answer and 3-5 key_points that should be in a correct answer.
-- Each option should be a complete, self-contained answer choice.
+}
+Provide a comprehensive model_answer and 3-5 key_points that should be in a correct answer.""",
+}
+
+
+async def fetch_quiz_context(topic, topic_id=None):
+    """
+    Top passages for the quiz topic, retrieved once and memoized per topic
+    (a hit skips both the embedding and the search). Catalog topics are
+    restricted to the chunks of their cluster.
+    """
+    quiz_passages.sync_version(ingest_version())
+    key = quiz_passages.key(topic, topic_id)
+    passages = quiz_passages.get(key)
+    if passages is not None:
+        return passages
+
+    embed = await embed_batcher.encode(topic)
+    passages = await retrieve_documents(
+        topic, embed,
+        top_k=QUIZ_CONTEXT_K,
+        score_threshold=QUIZ_CONTEXT_THRESHOLD,
+        query_filter=topic_filter(topic_id) if topic_id is not None else None
+    )
+    if passages:
+        quiz_passages.put(key, passages)
+    return passages
+
+
+async def generate_question(topic=None, context=None, qtype=None):
+    if not topic:
+        topic = (get_random_topic() or {}).get("label", "network security")
+
+    qtype = qtype or random.choice(QUESTION_TYPES)
+
+    material = f"""
+Base the question ONLY on this study material:
+---
+{context}
+---
+""" if context else ""
+
+    prompt = f"""
+You are a cybersecurity exam expert.
+Generate ONE question of type "{qtype}" on topic "{topic}".
+{material}
+Reply in VALID JSON ONLY, no markdown, no text outside the JSON:
+{QUESTION_SCHEMAS[qtype]}
 """
 
-    raw = lmstudio_generate(prompt)
+    raw = await lmstudio_generate(prompt, question_response_format(qtype))
     if not raw:
         return fallback_question()
 
     data = clean_json(raw)
-    if not data:
+    if data is None:
+        question_validator.parse_failed()
         return fallback_question()
+    return question_validator.validate(data, qtype) or fallback_question()
+
+
+async def generate_question_batch(topic, slots, results):
+    """
+    Requests len(slots) questions — slots are (qtype, context) — in ONE
+    completion. The reply is constrained to {"questions": [...]} by a JSON
+    schema; without one (backend ignores response_format) a bare array is
+    parsed too. The stream is parsed incrementally and every valid (repaired)
+    question is written into `results` (aligned with slots) as soon as it is
+    complete, so a cut-off or partly broken reply still keeps the good questions.
+    """
+    materials = []
+    items = []
+    for n, (qtype, context) in enumerate(slots, start=1):
+        if context:
+            materials.append(f"[{n}]\n{context}")
+            items.append(f'{n}. type "{qtype}", based on material [{n}]')
+        else:
+            items.append(f'{n}. type "{qtype}"')
+    schemas = "\n".join(
+        f'"{qtype}":\n{QUESTION_SCHEMAS[qtype]}' for qtype in dict.fromkeys(q for q, _ in slots)
+    )
+    material = "\nStudy material (base each question ONLY on its material):\n" + "\n\n".join(materials) + "\n" \
+        if materials else ""
 
-    # FIX FORMATS
-    if data["type"] == "true_false":
-        data["options"] = ["True", "False"]
+    prompt = f"""
+You are a cybersecurity exam expert.
+Generate {len(slots)} different questions on topic "{topic}", in this order:
+{chr(10).join(items)}
+{material}
+Reply with a JSON object {{"questions": [...]}} holding exactly {len(slots)} question objects, no markdown, no text outside the JSON.
+Object format per type:
+{schemas}
+"""
 
-    # Validate multiple choice/answer questions have options
-    if data["type"] in ["multiple_choice", "multiple_answer"]:
-        if "options" not in data or not data["options"] or len(data["options"]) < 2:
-            print(f"Warning: Invalid options generated for {data['type']}, regenerating...")
+    wrapped = ObjectStreamParser(level=1)
+    bare = ObjectStreamParser()
+    seen = 0
+    try:
+        async for token in llm.stream(
+            LLMClient.build_messages(None, prompt),
+            temperature=0.55,
+            max_tokens=QUESTION_MAX_TOKENS * len(slots),
+            response_format=batch_response_format([qtype for qtype, _ in slots])
+        ):
+            objects = wrapped.feed(token) + [o for o in bare.feed(token) if "questions" not in o]
+            for data in objects:
+                seen += 1
+                question = question_validator.validate(data)
+                if question is None:
+                    continue
+                # Prefer the first open slot asking for this type, else the first open slot
+                open_slots = [i for i, r in enumerate(results) if r is None]
+                if not open_slots:
+                    return
+                typed = [i for i in open_slots if slots[i][0] == question["type"]]
+                results[(typed or open_slots)[0]] = question
+    finally:
+        # Elements that never parsed (malformed or cut off) count as parse failures
+        if seen < len(slots):
+            question_validator.parse_failed(len(slots) - seen)
+
+
+async def generate_question_async(topic, semaphore, context=None):
+    """Runs generate_question bounded by the semaphore and a per-question timeout."""
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(generate_question(topic, context), timeout=QUESTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Warning: Question generation timed out after {QUESTION_TIMEOUT}s")
             return fallback_question()
+        except Exception as e:
+            print(f"Error generating question: {e}")
+            return fallback_question()
+
 
-    data.setdefault("explanation", "")
+def resolve_quiz_topic(topic=None):
+    """(label, topic_id) for the requested topic, or a random catalog topic."""
+    if topic:
+        return topic, None
+    entry = get_random_topic()
+    return (entry["label"], entry["id"]) if entry else ("network security", None)
+
+
+async def generate_quiz_questions(topic=None, count=NUM_QUESTIONS):
+    """
+    Draws the quiz from the question bank; only questions the topic's pools
+    cannot supply are generated live.
+    """
+    topic, topic_id = resolve_quiz_topic(topic)
+    quiz = await asyncio.to_thread(question_bank.draw, topic, count)
+    if len(quiz) < count:
+        quiz += await generate_live_questions(topic, topic_id, count - len(quiz))
+    return quiz
+
+
+async def generate_live_questions(topic, topic_id, count):
+    """
+    Generates `count` questions: in batched mode with one completion for all of
+    them, otherwise concurrently (capped at QUIZ_CONCURRENCY in flight).
+    The topic's passages are fetched once and each question gets its own slice.
+    """
+    try:
+        passages = await fetch_quiz_context(topic, topic_id)
+    except Exception as e:
+        print(f"Warning: Could not retrieve quiz context: {e}")
+        passages = []
+    slices = passage_slices(passages, count, QUIZ_SLICE_CHARS)
+
+    if QUIZ_BATCH_GENERATION:
+        return await generate_batched_questions(topic, slices)
+
+    semaphore = asyncio.Semaphore(max(1, QUIZ_CONCURRENCY))
+    return list(await asyncio.gather(
+        *(generate_question_async(topic, semaphore, context) for context in slices)
+    ))
+
+
+async def generate_batched_questions(topic, slices):
+    """One batched request for all questions, then re-requests only the missing ones."""
+    slots = [(random.choice(QUESTION_TYPES), context) for context in slices]
+    results = [None] * len(slots)
+
+    for attempt in range(QUIZ_BATCH_RETRIES + 1):
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            break
+        if attempt:
+            print(f"Warning: {len(missing)} question(s) missing from the batch, re-requesting...")
+        partial = [None] * len(missing)
+        try:
+            await asyncio.wait_for(
+                generate_question_batch(topic, [slots[i] for i in missing], partial),
+                timeout=QUIZ_BATCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"Warning: Batched question generation timed out after {QUIZ_BATCH_TIMEOUT}s")
+        except Exception as e:
+            print(f"Error generating question batch: {e}")
+        for i, question in zip(missing, partial):
+            results[i] = question
+
+    return [r or fallback_question() for r in results]
+
+
+def next_bank_pool(topics, rejects, depths):
+    """The (topic entry, qtype) pool furthest below QUESTION_BANK_DEPTH, or None when all are full."""
+    best = None
+    for entry in topics:
+        for qtype in QUESTION_TYPES:
+            if rejects.get((entry["label"], qtype), 0) >= QUESTION_BANK_MAX_REJECTS:
+                continue
+            depth = depths.get((topic_key(entry["label"]), qtype), 0)
+            if depth < QUESTION_BANK_DEPTH and (best is None or depth < best[0]):
+                best = (depth, entry, qtype)
+    return best[1:] if best else None
+
+
+async def refill_question_bank():
+    """
+    Background worker: generates one grounded question at a time for the
+    emptiest pool and banks it unless it near-duplicates a banked question.
+    Pools of topics that left the catalog are pruned after re-ingestion.
+    """
+    version = object()
+    rejects = {}  # (topic, qtype) -> consecutive near-duplicate rejections
+    while True:
+        try:
+            topic_catalog.sync_version(ingest_version())
+            if topic_catalog.version != version:
+                version = topic_catalog.version
+                rejects.clear()
+                if len(topic_catalog):
+                    await asyncio.to_thread(question_bank.prune, [t["label"] for t in topic_catalog.topics])
+            topics = topic_catalog.topics or [{"id": None, "label": "network security"}]
+
+            depths = await asyncio.to_thread(question_bank.pool_depths)
+            pool = next_bank_pool(topics, rejects, depths)
+            if pool is None:
+                await asyncio.sleep(QUESTION_BANK_IDLE)
+                rejects.clear()
+                continue
+            entry, qtype = pool
+
+            passages = await fetch_quiz_context(entry["label"], entry["id"])
+            context = random.choice(passage_slices(passages, len(passages), QUIZ_SLICE_CHARS)) if passages else None
+            data = await asyncio.wait_for(generate_question(entry["label"], context, qtype), timeout=QUESTION_TIMEOUT)
+
+            if data.get("question") == FALLBACK_QUESTION_TEXT or data.get("type") not in QUESTION_TYPES:
+                # LLM unavailable or unusable output: back off instead of hammering it
+                await asyncio.sleep(QUESTION_BANK_IDLE)
+                continue
+            embed = await embed_batcher.encode(data["question"])
+            if await asyncio.to_thread(question_bank.add, entry["label"], data["type"], data, embed):
+                rejects.pop((entry["label"], qtype), None)
+            else:
+                rejects[(entry["label"], qtype)] = rejects.get((entry["label"], qtype), 0) + 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Question bank refill error: {e}")
+            await asyncio.sleep(QUESTION_BANK_IDLE)
 
-    return data
+
+FALLBACK_QUESTION_TEXT = "Error generating question."
 
 
 def fallback_question():
     return {
-        "question": "Error generating question.",
+        "question": FALLBACK_QUESTION_TEXT,
         "type": "true_false",
         "options": ["True", "False"],
         "correct_answer": "True",
@@ -344,7 +821,7 @@ def fallback_question():
     }
 
 
-def grade_answer(user_answer, correct, qtype, explanation, model_answer=None, key_points=None):
+async def grade_answer(user_answer, correct, qtype, explanation, model_answer=None, key_points=None):
     if qtype == "multiple_answer":
         if isinstance(user_answer, list):
             user_answers = [str(x).strip() for x in user_answer if isinstance(x, str) and x.strip()]
@@ -394,6 +871,17 @@ def grade_answer(user_answer, correct, qtype, explanation, model_answer=None, ke
                 "ai_feedback": "No answer was provided."
             }
 
+        # Embedding pre-grade: clear-cut answers are decided without the LLM
+        pre = None
+        if PREGRADER_ENABLED:
+            try:
+                pre = await asyncio.to_thread(answer_pregrader.grade, answer_text, model_answer, key_points)
+            except Exception as e:
+                print(f"Warning: Pre-grading failed: {e}")
+        audit = pre is not None and pre["decision"] != "escalate" and answer_pregrader.should_audit()
+        if pre is not None and pre["decision"] != "escalate" and not audit:
+            return pregraded_result(pre, answer_text, model_answer, explanation)
+
         # Use LLM to grade the open-ended answer
         grading_prompt = f"""You are an expert grader for cybersecurity exams.
 Evaluate the student's answer based on the model answer and key points.
@@ -416,13 +904,15 @@ Reply in VALID JSON ONLY:
 }}"""
 
         try:
-            grading_result = lmstudio_generate(grading_prompt)
+            grading_result = await lmstudio_generate(grading_prompt, json_schema_format("grade", GRADE_JSON_SCHEMA))
             grading_data = clean_json(grading_result)
 
             if grading_data and "score" in grading_data:
                 score = max(0.0, min(1.0, float(grading_data.get("score", 0.0))))
                 feedback = grading_data.get("feedback", "Unable to generate feedback.")
                 correct_flag = score >= 0.7
+                if audit:
+                    answer_pregrader.record_audit(pre["score"], score)
 
                 return {
                     "correct": correct_flag,
@@ -436,16 +926,10 @@ Reply in VALID JSON ONLY:
         except Exception as e:
             print(f"Error grading open-ended question: {e}")
 
-        # Fallback if LLM grading fails
-        return {
-            "correct": False,
-            "score": 0.5,
-            "partial_score": 0.5,
-            "correct_answer": model_answer or "",
-            "user_answer": answer_text,
-            "explanation": explanation,
-            "ai_feedback": "Manual review required - automated grading failed."
-        }
+        # Fallback if LLM grading fails (an audited answer keeps its pre-grade)
+        if audit:
+            return pregraded_result(pre, answer_text, model_answer, explanation)
+        return grading_failed(answer_text, model_answer, explanation)
 
     answer_text = (user_answer or "").strip()
     correct_text = (correct or "").strip()
@@ -459,6 +943,98 @@ Reply in VALID JSON ONLY:
         "explanation": explanation
     }
 
+
+def pregraded_result(pre, answer_text, model_answer, explanation):
+    """Result for an open-ended answer decided by the embedding pre-grader."""
+    return {
+        "correct": pre["score"] >= 0.7,
+        "score": pre["score"],
+        "partial_score": pre["score"],
+        "correct_answer": model_answer or "",
+        "user_answer": answer_text,
+        "explanation": explanation,
+        "ai_feedback": AnswerPreGrader.feedback(pre)
+    }
+
+
+def grading_failed(answer_text, model_answer, explanation):
+    """Neutral result for an open-ended answer the LLM could not grade."""
+    return {
+        "correct": False,
+        "score": 0.5,
+        "partial_score": 0.5,
+        "correct_answer": model_answer or "",
+        "user_answer": answer_text,
+        "explanation": explanation,
+        "ai_feedback": "Manual review required - automated grading failed."
+    }
+
+
+async def grade_answer_async(semaphore, user_answer, explanation, model_answer, key_points):
+    """Grades one open-ended answer bounded by the semaphore and a timeout."""
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(
+                grade_answer(user_answer, None, "open_ended", explanation,
+                             model_answer=model_answer, key_points=key_points),
+                timeout=GRADING_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"Warning: Grading timed out after {GRADING_TIMEOUT}s")
+            return grading_failed((user_answer or "").strip(), model_answer, explanation)
+
+
+async def grade_submission(form):
+    """
+    Grades every answered question of the quiz form. The deterministic types
+    are graded inline; all open-ended answers are sent to the LLM at once
+    (capped at GRADING_CONCURRENCY in flight), so a submission costs about one
+    grading round-trip instead of one per open-ended question. Results keep
+    the question order.
+    """
+    semaphore = asyncio.Semaphore(max(1, GRADING_CONCURRENCY))
+    results = []
+    pending = {}  # index in results -> grading task
+
+    for i in range(1, NUM_QUESTIONS + 1):
+        qtype = form.get(f"type_{i}")
+        if not qtype:
+            continue
+
+        question = form.get(f"question_{i}")
+        explanation = form.get(f"explanation_{i}")
+
+        if qtype == "multiple_answer":
+            user_answer = form.getlist(f"answer_{i}")
+            correct = json.loads(form.get(f"correct_{i}"))
+            graded = await grade_answer(user_answer, correct, qtype, explanation)
+        elif qtype == "open_ended":
+            user_answer = form.get(f"answer_{i}", "")
+            model_answer = form.get(f"model_answer_{i}", "")
+            key_points_str = form.get(f"key_points_{i}", "[]")
+            try:
+                key_points = json.loads(key_points_str)
+            except:
+                key_points = []
+            pending[len(results)] = asyncio.create_task(
+                grade_answer_async(semaphore, user_answer, explanation, model_answer, key_points)
+            )
+            graded = {}
+        else:
+            user_answer = form.get(f"answer_{i}", "")
+            correct = form.get(f"correct_{i}")
+            graded = await grade_answer(user_answer, correct, qtype, explanation)
+
+        graded["question"] = question
+        results.append(graded)
+
+    if pending:
+        graded_open = await asyncio.gather(*pending.values())
+        for index, graded in zip(pending, graded_open):
+            graded["question"] = results[index]["question"]
+            results[index] = graded
+    return results
+
 # ============================================================
 # ROUTES
 # ============================================================
@@ -487,21 +1063,30 @@ def quiz_page(request: Request):
 
 
 @app.post("/query", response_model=QueryResponse)
-def api_query(req: QueryRequest):
-    response, source = generate_response_logic(req.prompt)
+async def api_query(req: QueryRequest):
+    response, source = await generate_response_logic(req.prompt)
     return QueryResponse(response=response, source=source)
 
 
+@app.post("/query-stream")
+async def api_query_stream(req: QueryRequest):
+    return StreamingResponse(
+        stream_response_logic(req.prompt),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/query-form", response_class=HTMLResponse)
-def form_query(request: Request, prompt: str = Form(...)):
-    response, source = generate_response_logic(prompt)
+async def form_query(request: Request, prompt: str = Form(...)):
+    response, source = await generate_response_logic(prompt)
     html = render_template("unified.html", active_tab="chatbot", prompt=prompt, response=response, source=source, quiz=[], results=None)
     return HTMLResponse(html)
 
 
 @app.post("/generate", response_class=HTMLResponse)
 async def generate_quiz(request: Request, topic: str = Form(None)):
-    quiz = [generate_question(topic) for _ in range(NUM_QUESTIONS)]
+    quiz = await generate_quiz_questions(topic)
     html = render_template("unified.html", active_tab="quiz", prompt="", response="", source="", quiz=quiz, results=None)
     return HTMLResponse(html)
 
@@ -509,39 +1094,40 @@ async def generate_quiz(request: Request, topic: str = Form(None)):
 @app.post("/submit-quiz", response_class=HTMLResponse)
 async def submit_quiz(request: Request):
     form = await request.form()
-    results = []
+    results = await grade_submission(form)
 
-    for i in range(1, NUM_QUESTIONS + 1):
-        qtype = form.get(f"type_{i}")
-        if not qtype:
-            continue
+    html = render_template("unified.html", active_tab="quiz", prompt="", response="", source="", quiz=[], results=results)
+    return HTMLResponse(html)
 
-        question = form.get(f"question_{i}")
-        explanation = form.get(f"explanation_{i}")
 
-        if qtype == "multiple_answer":
-            user_answer = form.getlist(f"answer_{i}")
-            correct = json.loads(form.get(f"correct_{i}"))
-            graded = grade_answer(user_answer, correct, qtype, explanation)
-        elif qtype == "open_ended":
-            user_answer = form.get(f"answer_{i}", "")
-            model_answer = form.get(f"model_answer_{i}", "")
-            key_points_str = form.get(f"key_points_{i}", "[]")
-            try:
-                key_points = json.loads(key_points_str)
-            except:
-                key_points = []
-            graded = grade_answer(user_answer, None, qtype, explanation, model_answer=model_answer, key_points=key_points)
-        else:
-            user_answer = form.get(f"answer_{i}", "")
-            correct = form.get(f"correct_{i}")
-            graded = grade_answer(user_answer, correct, qtype, explanation)
+@app.post("/cache/invalidate")
+def invalidate_cache():
+    answer_cache.invalidate()
+    return {"status": "ok"}
 
-        graded["question"] = question
-        results.append(graded)
 
-    html = render_template("unified.html", active_tab="quiz", prompt="", response="", source="", quiz=[], results=results)
-    return HTMLResponse(html)
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the retrieval embedding model is warm."""
+    is_ready = models.is_warm(CHATBOT_EMBED_MODEL)
+    return JSONResponse(
+        {"ready": is_ready, "models": models.status()},
+        status_code=200 if is_ready else 503
+    )
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "llm": llm.stats(),
+        "answer_cache": answer_cache.stats(),
+        "embedding_batcher": embed_batcher.stats(),
+        "context_packer": context_packer.stats(),
+        "quiz_context": quiz_passages.stats(),
+        "question_bank": question_bank.stats(),
+        "question_validation": question_validator.stats(),
+        "answer_pregrader": answer_pregrader.stats()
+    }
 
 
 # ============================================================
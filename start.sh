@@ -22,9 +22,20 @@ else
     echo "  ✓ Qdrant is running"
 fi
 
-# Step 3: Start the application
+# Step 3: Restore the index artifact into an empty collection (seconds instead of re-ingesting)
 echo ""
-echo "Step 3: Starting FastAPI application..."
+echo "Step 3: Restoring index snapshot (if collection is missing)..."
+if [ -f index_artifacts/network_security_docs.tar.gz ]; then
+    python Scripts/index_artifact.py restore --if-missing \
+        || python Scripts/index_artifact.py restore --target local --if-missing \
+        || echo "  ⚠ Index restore failed — the app will fall back to web search"
+else
+    echo "  ⚠ No artifact found (create one with: python Scripts/index_artifact.py export)"
+fi
+
+# Step 4: Start the application
+echo ""
+echo "Step 4: Starting FastAPI application..."
 PORT=${PORT:-8000}
 echo "  → Server will run on http://0.0.0.0:$PORT"
 uvicorn Scripts.unified_app:app --host 0.0.0.0 --port $PORT